@@ -0,0 +1,87 @@
+"""
+Parsing and rendering of the <agenda> blocks the assistant emits.
+
+The model is asked for <agenda>"item1", "item2"</agenda> but does not always comply, so the
+parser also accepts JSON lists, unquoted comma separated items and bulleted or numbered lines.
+Messages are parsed once when they are stored; reads use the stored display text.
+"""
+from typing import List, Optional
+import csv
+import json
+import re
+
+AGENDA_BLOCK = re.compile(r"<agenda>(.*?)</agenda>", re.DOTALL)
+EOC_MARKER = "#EOC#"
+# Repeated markers can share their "#" (#EOC#EOC#), so a run of them is removed as a whole
+EOC_RUN = re.compile(r"#EOC(?:#EOC)*#")
+
+_list_marker = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_quotes = "\"'“”‘’"
+# A line made only of double-quoted items: "a" "b", "c"
+_quoted_item = re.compile(r'"([^"]*)"|“([^”]*)”')
+_quoted_line = re.compile(r'^(?:\s*(?:"[^"]*"|“[^”]*”)\s*,?)+\s*$')
+
+
+def _clean_item(item: str) -> str:
+    return item.strip().rstrip(",").strip().strip(_quotes).strip()
+
+
+def _split_line(line: str) -> List[str]:
+    # A bulleted or numbered line is one item even if it contains commas
+    if _list_marker.match(line):
+        return [_list_marker.sub("", line, count=1)]
+    # csv only splits on commas and would read "a" "b" as one item
+    if _quoted_line.match(line):
+        return [straight or curly for straight, curly in _quoted_item.findall(line)]
+    return next(csv.reader([line], skipinitialspace=True), [])
+
+
+def parse_agenda_items(content: str) -> List[str]:
+    """
+    Parse the content of an <agenda> block into a list of items. Never raises.
+    """
+    content = content.strip()
+    if not content:
+        return []
+
+    for candidate in (content, f"[{content}]"):
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, list):
+            return [str(item).strip() for item in value if str(item).strip()]
+
+    items = []
+    for line in content.splitlines():
+        if line.strip():
+            items.extend(_split_line(line.strip()))
+    return [cleaned for cleaned in (_clean_item(item) for item in items) if cleaned]
+
+
+def extract_agenda(text: str) -> Optional[List[str]]:
+    """
+    Return the items of the first <agenda> block in text, or None if there is no block.
+    """
+    match = AGENDA_BLOCK.search(text)
+    if match is None:
+        return None
+    return parse_agenda_items(match.group(1))
+
+
+def strip_eoc(text: str) -> str:
+    """
+    Remove every end-of-conversation marker from text.
+    """
+    return EOC_RUN.sub("", text)
+
+
+def render_agenda(items: List[str]) -> str:
+    return "\n".join(f"{i + 1}. {item}" for i, item in enumerate(items))
+
+
+def render_message(text: str) -> str:
+    """
+    Return the display text of a message: agenda blocks become numbered lists.
+    """
+    return AGENDA_BLOCK.sub(lambda match: render_agenda(parse_agenda_items(match.group(1))), text)
@@ -1,20 +1,117 @@
 import os
 from dotenv import load_dotenv
-from fastapi import UploadFile, HTTPException
-from fastapi.responses import FileResponse
-from openai import OpenAI
-from typing import List, Dict
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
+from typing import List, Dict, AsyncIterator, Optional
+from pathlib import Path
+import asyncio
+import logging
+import re
+import httpx
+
+from .agenda import EOC_MARKER, extract_agenda, parse_agenda_items, strip_eoc
+from .util.response_cache import ResponseCache, response_cache, make_key
+from .util.ttl_store import create_store
+from .util.scheduler import scheduler, Priority
+from .util.model_router import model_router
+from .util.audio_cache import audio_cache
+from .util.audio import ffmpeg_available, probe_duration, split_audio, AUDIO_CHUNK_SECONDS, WHISPER_MAX_BYTES
 import json
-import io
-import tempfile
-from starlette.background import BackgroundTask
+from contextlib import AsyncExitStack
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _token_encoding = tiktoken.encoding_for_model("gpt-4o")
+except Exception as e:
+    # tiktoken is in requirements.txt, but its encoding is downloaded on first use and may be
+    # unavailable offline; fall back to the ~4 characters per token rule of thumb
+    logger.warning(f"Token counts are estimated, tiktoken is not available: {e}")
+    _token_encoding = None
+
 # Initialize OpenAI client using the API key from environment variable
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Async client used by the API routes. All requests share one pooled HTTP connection so
+# concurrent prep sessions reuse keep-alive connections instead of blocking the event loop.
+# Retries are handled by the scheduler (app/util/scheduler.py), which also enforces rate limits.
+async_client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    max_retries=0,
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        ),
+        timeout=httpx.Timeout(float(os.getenv("OPENAI_TIMEOUT", "60")), connect=5.0)
+    )
+)
+
+# When enabled, the greeting is generated for a placeholder user and the real username is
+# substituted afterwards, so all participants of a meeting share one cached greeting. Off by
+# default: the model does not always repeat the placeholder, so some greetings lose the name.
+TEMPLATE_GREETING = os.getenv("TEMPLATE_GREETING", "false").lower() in ("1", "true", "yes")
+USERNAME_PLACEHOLDER = "{{username}}"
+
+TTS_MODEL = os.getenv("TTS_MODEL", "tts-1")
+TRANSCRIPTION_MODEL = os.getenv("TRANSCRIPTION_MODEL", "whisper-1")
+
+# "tags" parses <agenda> blocks and the #EOC# marker out of the reply text, "tools" lets the
+# model report agenda updates and the end of the conversation through function calls.
+CHAT_ENGINE = os.getenv("CHAT_ENGINE", "tags")
+
+# How the model reports the agenda and the end of the conversation, per engine
+TAGS_INSTRUCTIONS = """You can always output the updated agenda as 
+
+<agenda>
+"item1", "item2", "item3", ...
+</agenda>
+
+As soon as the user is happy with the agenda, output the agenda again. On top, output a #EOC# as marker that
+the systems knows the conversation is over.
+
+and say goodbye."""
+
+TOOLS_INSTRUCTIONS = """Call update_agenda with the full agenda whenever it changes. As soon as the user is happy
+with the agenda, call end_conversation and say goodbye. Always also reply to the user in text."""
+
+AGENDA_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "update_agenda",
+            "description": "Replace the user's personal agenda for the meeting with the given items.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {"items": {"type": "array", "items": {"type": "string"}}},
+                "required": ["items"],
+                "additionalProperties": False
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "end_conversation",
+            "description": "End the preparation once the user is happy with the agenda.",
+            "strict": True,
+            "parameters": {"type": "object", "properties": {}, "required": [], "additionalProperties": False}
+        }
+    }
+]
+
+ERROR_RESPONSE = {
+    "response": "I apologize, but I encountered an error while processing your request.",
+    "agenda": None,
+    "conversation_ended": False
+}
+
 
 def generate_initial_prompt(meeting_title: str, meeting_description: str, username: str) -> str:
     """
@@ -27,16 +124,39 @@ Help user {username} clarify their personal agenda  for the meeting.
 Update the agenda and refine it, while taking to the user. Make sure the agenda is concrete and specific.
 Ask the user questions to clarify their agenda and make it concrete, so that the meeting can be more productive.
 Always be concise and to the point. Just one question at a time.
-You can always output the updated agenda as 
+{TOOLS_INSTRUCTIONS if CHAT_ENGINE == "tools" else TAGS_INSTRUCTIONS}"""
 
-<agenda>
-"item1", "item2", "item3", ...
-</agenda>
 
-As soon as the user is happy with the agenda, output the agenda again. On top, output a #EOC# as marker that
-the systems knows the conversation is over.
+def build_chat_messages(system_message: str, messages: List[str]) -> List[Dict[str, str]]:
+    """
+    Build the OpenAI chat payload. Messages alternate between assistant and user, starting with the assistant.
+    """
+    return [
+        {"role": "system", "content": system_message},
+        *[{"role": "assistant" if i % 2 == 0 else "user", "content": msg} for i, msg in enumerate(messages)]
+    ]
 
-and say goodbye."""
+
+def parse_assistant_response(assistant_response: str) -> Dict[str, str]:
+    """
+    Split a raw completion into the response text, the agenda if present and the end-of-conversation flag.
+    """
+    logger.debug("Raw assistant response: %s", assistant_response)
+
+    # Parse agenda if present
+    agenda = extract_agenda(assistant_response)
+    
+    # Remove #EOC# marker from the response
+    processed_response = strip_eoc(assistant_response).strip()
+    
+    logger.debug("Processed response: %s", processed_response)
+    logger.debug("Processed agenda: %s", agenda)
+
+    return {
+        "response": processed_response,
+        "agenda": agenda,
+        "conversation_ended": EOC_MARKER in assistant_response
+    }
 
 
 def process_user_message(system_message: str, messages: List[str]) -> Dict[str, str]:
@@ -44,62 +164,390 @@ def process_user_message(system_message: str, messages: List[str]) -> Dict[str,
     Process the user's message and return the assistant's response along with the agenda if present.
     """
     try:
-        # Debug: Print input messages
-        print("Debug: System message:", system_message)
-        print("Debug: Input messages:", messages)
+        logger.debug("System message: %s", system_message)
+        logger.debug("Input messages: %s", messages)
 
         # Call the OpenAI API with the system message and messages list
         response = client.chat.completions.create(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_message},
-                *[{"role": "assistant" if i % 2 == 0 else "user", "content": msg} for i, msg in enumerate(messages)]
-            ],
+            messages=build_chat_messages(system_message, messages),
             temperature=0.7,
             max_tokens=150
         )
-        assistant_response = response.choices[0].message.content
-
-        # Debug: Print raw assistant response
-        print("Debug: Raw assistant response:", assistant_response)
-
-        # Parse agenda if present
-        agenda = None
-        if "<agenda>" in assistant_response and "</agenda>" in assistant_response:
-            agenda_start = assistant_response.index("<agenda>") + len("<agenda>")
-            agenda_end = assistant_response.index("</agenda>")
-            agenda_str = assistant_response[agenda_start:agenda_end].strip()
-            
-            # Debug: Print agenda string before parsing
-            print("Debug: Agenda string before parsing:", agenda_str)
-            
-            agenda = json.loads(f"[{agenda_str}]")
-            
-            # Remove the agenda from the assistant's response
-            #assistant_response = assistant_response[:agenda_start-len("<agenda>")] + assistant_response[agenda_end+len("</agenda>"):]
-        
-        # Remove #EOC# marker from the response
-        assistant_response = assistant_response.replace("#EOC#", "").strip()
-        
-        # Debug: Print final processed response and agenda
-        print("Debug: Processed response:", assistant_response)
-        print("Debug: Processed agenda:", agenda)
+        return parse_assistant_response(response.choices[0].message.content)
+    except Exception:
+        logger.exception("Error in chat completion")
+        return dict(ERROR_RESPONSE)
 
-        return {
-            "response": assistant_response,
-            "agenda": agenda,
-            "conversation_ended": "#EOC#" in response.choices[0].message.content
+
+def estimate_chat_tokens(system_message: str, messages: List[str], max_tokens: int) -> int:
+    """
+    Estimate the tokens a chat call will use, for the scheduler's tokens-per-minute budget.
+    """
+    return count_tokens(system_message) + sum(count_tokens(msg) for msg in messages) + max_tokens
+
+
+async def process_user_message_async(system_message: str, messages: List[str], priority: Priority = Priority.INTERACTIVE) -> Dict[str, str]:
+    """
+    Async version of process_user_message for use from the API routes.
+    """
+    if CHAT_ENGINE == "tools":
+        return await process_user_message_tools(system_message, messages, priority=priority)
+    try:
+        logger.debug("System message: %s", system_message)
+        logger.debug("Input messages: %s", messages)
+
+        response, _ = await model_router.call(messages, lambda tier: scheduler.call(
+            tier.model,
+            lambda: async_client.chat.completions.create(
+                model=tier.model,
+                messages=build_chat_messages(system_message, messages),
+                temperature=0.7,
+                max_tokens=tier.max_tokens
+            ),
+            tokens=estimate_chat_tokens(system_message, messages, tier.max_tokens),
+            priority=priority
+        ))
+        return parse_assistant_response(response.choices[0].message.content)
+    except Exception:
+        logger.exception("Error in chat completion")
+        return dict(ERROR_RESPONSE)
+
+
+def parse_tool_calls(tool_calls) -> Dict:
+    """
+    Read the agenda and the end-of-conversation flag from the model's function calls.
+    """
+    agenda = None
+    conversation_ended = False
+    for call in tool_calls or []:
+        try:
+            arguments = json.loads(call.function.arguments or "{}")
+        except ValueError:
+            arguments = {}
+        if call.function.name == "update_agenda":
+            agenda = [str(item).strip() for item in arguments.get("items", []) if str(item).strip()]
+        elif call.function.name == "end_conversation":
+            conversation_ended = True
+    return {"agenda": agenda, "conversation_ended": conversation_ended}
+
+
+async def process_user_message_tools(system_message: str, messages: List[str], priority: Priority = Priority.INTERACTIVE) -> Dict[str, str]:
+    """
+    Function-calling version of process_user_message_async. Returns the same structure; the
+    agenda is appended to the response as an <agenda> block so it is stored and displayed as before.
+    """
+    try:
+        # Conversations started with the tags engine carry its marker instructions in their prompt
+        if TAGS_INSTRUCTIONS in system_message:
+            system_message = system_message.replace(TAGS_INSTRUCTIONS, TOOLS_INSTRUCTIONS)
+        elif TOOLS_INSTRUCTIONS not in system_message:
+            system_message = f"{system_message}\n\n{TOOLS_INSTRUCTIONS}"
+        chat_messages = build_chat_messages(system_message, messages)
+        response, tier = await model_router.call(messages, lambda tier: scheduler.call(
+            tier.model,
+            lambda: async_client.chat.completions.create(
+                model=tier.model,
+                messages=chat_messages,
+                tools=AGENDA_TOOLS,
+                parallel_tool_calls=False,
+                temperature=0.7,
+                max_tokens=tier.max_tokens
+            ),
+            tokens=estimate_chat_tokens(system_message, messages, tier.max_tokens),
+            priority=priority
+        ))
+        message = response.choices[0].message
+        result = parse_tool_calls(message.tool_calls)
+        text = (message.content or "").strip()
+
+        if not text and message.tool_calls:
+            # The model only called tools; ask for the reply to the user
+            follow_up = chat_messages + [
+                {"role": "assistant", "tool_calls": [call.model_dump() for call in message.tool_calls]},
+                *[{"role": "tool", "tool_call_id": call.id, "content": "ok"} for call in message.tool_calls]
+            ]
+            # Ask the tier that made the tool calls first
+            response, _ = await model_router.call(messages, lambda tier: scheduler.call(
+                tier.model,
+                lambda: async_client.chat.completions.create(
+                    model=tier.model,
+                    messages=follow_up,
+                    tools=AGENDA_TOOLS,
+                    tool_choice="none",
+                    temperature=0.7,
+                    max_tokens=tier.max_tokens
+                ),
+                tokens=estimate_chat_tokens(system_message, messages, tier.max_tokens),
+                priority=priority
+            ), tier=tier)
+            text = (response.choices[0].message.content or "").strip()
+
+        if result["agenda"]:
+            text = f"{text}\n<agenda>\n" + ", ".join(json.dumps(item) for item in result["agenda"]) + "\n</agenda>"
+        return {"response": text, **result}
+    except Exception:
+        logger.exception("Error in chat completion")
+        return dict(ERROR_RESPONSE)
+
+
+async def generate_initial_message(meeting_title: str, meeting_description: str, username: str, priority: Priority = Priority.INTERACTIVE) -> Dict[str, str]:
+    """
+    Generate the assistant's opening message for a new conversation, served from the response cache when possible.
+    """
+    prompt_username = USERNAME_PLACEHOLDER if TEMPLATE_GREETING else username
+    prompt = generate_initial_prompt(meeting_title, meeting_description, prompt_username)
+    key = make_key(model_router.choose([])[0].model, prompt, [])
+
+    result = await response_cache.aget(key)
+    if result is None:
+        result = await process_user_message_async(prompt, [], priority=priority)
+        if result["response"] == ERROR_RESPONSE["response"]:
+            return result
+        await response_cache.aset(key, result)
+
+    if TEMPLATE_GREETING:
+        result = {
+            **result,
+            "response": result["response"].replace(USERNAME_PLACEHOLDER, username),
+            "agenda": [item.replace(USERNAME_PLACEHOLDER, username) for item in result["agenda"]] if result["agenda"] else result["agenda"]
         }
-    except Exception as e:
-        # Debug: Print full exception details
-        import traceback
-        print(f"Debug: Full exception details:\n{traceback.format_exc()}")
+    return result
+
+
+class StreamingResponseParser:
+    """
+    Incrementally parses a streamed assistant response.
+
+    Text outside of the <agenda> block is released as soon as it can no longer be the start of
+    a marker, the agenda is parsed once its closing tag arrives and the #EOC# marker is dropped.
+    The raw text is kept so the final result matches what process_user_message returns.
+    """
+    AGENDA_OPEN = "<agenda>"
+    AGENDA_CLOSE = "</agenda>"
+    EOC = EOC_MARKER
+
+    def __init__(self):
+        self.raw = ""
+        self.agenda: Optional[List[str]] = None
+        self._buffer = ""
+        self._in_agenda = False
+
+    def _held_back(self, text: str) -> int:
+        # Length of the suffix of text that could still grow into a marker. Complete #EOC# runs at
+        # the end are held back too, as the next chunk may continue them (#EOC#EOC#).
+        held = 0
+        for size in range(min(len(self.AGENDA_OPEN) - 1, len(text)), 0, -1):
+            if self.AGENDA_OPEN.startswith(text[-size:]):
+                held = size
+                break
+        # Runs repeat "#EOC" and a "#" only starts one every len("#EOC") characters, so the scan
+        # stops at the first "#" that does not start a run prefix
+        period = self.EOC[:-1]
+        start = text.rfind("#")
+        while start != -1:
+            suffix = text[start:]
+            if not (period * (len(suffix) // len(period) + 1)).startswith(suffix):
+                break
+            held = max(held, len(suffix))
+            start = text.rfind("#", 0, start)
+        return held
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Consume a chunk of the response and return the events it completes.
+        """
+        self.raw += chunk
+        self._buffer += chunk
+        events = []
+        while self._buffer:
+            if self._in_agenda:
+                end = self._buffer.find(self.AGENDA_CLOSE)
+                if end == -1:
+                    break
+                agenda_str = self._buffer[:end]
+                self._buffer = self._buffer[end + len(self.AGENDA_CLOSE):]
+                self._in_agenda = False
+                # Like extract_agenda, the first block is the agenda
+                if self.agenda is None:
+                    self.agenda = parse_agenda_items(agenda_str)
+                    events.append({"type": "agenda", "agenda": self.agenda})
+                continue
+
+            start = self._buffer.find(self.AGENDA_OPEN)
+            if start != -1:
+                text = self._buffer[:start]
+                self._buffer = self._buffer[start + len(self.AGENDA_OPEN):]
+                self._in_agenda = True
+            else:
+                keep = self._held_back(self._buffer)
+                text = self._buffer[:len(self._buffer) - keep]
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                if not text:
+                    break
+            text = strip_eoc(text)
+            if text:
+                events.append({"type": "token", "content": text})
+        return events
+
+    def close(self) -> List[Dict]:
+        """
+        Flush any text still held back once the stream has ended.
+        """
+        events = []
+        text = strip_eoc(self._buffer) if not self._in_agenda else ""
+        if text:
+            events.append({"type": "token", "content": text})
+        self._buffer = ""
+        return events
+
+    def fail(self, message: str):
+        """
+        Replace whatever was received so far with an error reply.
+        """
+        self.raw = message
+        self.agenda = None
+        self._buffer = ""
+        self._in_agenda = False
+
+    def result(self) -> Dict:
         return {
-            "response": "I apologize, but I encountered an error while processing your request.",
-            "agenda": None,
-            "conversation_ended": False
+            "response": strip_eoc(self.raw).strip(),
+            "agenda": self.agenda,
+            "conversation_ended": self.EOC in self.raw
         }
 
+
+async def stream_user_message(system_message: str, messages: List[str], parser: StreamingResponseParser) -> AsyncIterator[Dict]:
+    """
+    Stream the assistant's response token by token.
+
+    Yields the parser's events as the completion arrives; once the generator is exhausted,
+    parser.result() holds the same structure process_user_message returns.
+    """
+    if CHAT_ENGINE == "tools":
+        # Function calls are only usable once complete, so the tools engine answers in one piece
+        result = await process_user_message_tools(system_message, messages)
+        for event in parser.feed(result["response"] + (" #EOC#" if result["conversation_ended"] else "")):
+            yield event
+        for event in parser.close():
+            yield event
+        return
+    try:
+        # The scheduler and the tier fallback cover starting the stream; tokens are then consumed
+        # outside the slot, and the usage arrives with the last chunk
+        stream, tier = await model_router.call(messages, lambda tier: scheduler.call(
+            tier.model,
+            lambda: async_client.chat.completions.create(
+                model=tier.model,
+                messages=build_chat_messages(system_message, messages),
+                temperature=0.7,
+                max_tokens=tier.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            ),
+            tokens=estimate_chat_tokens(system_message, messages, tier.max_tokens)
+        ))
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                model_router.record_usage(tier, chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                for event in parser.feed(delta):
+                    yield event
+        for event in parser.close():
+            yield event
+    except Exception:
+        logger.exception("Error in streamed chat completion")
+        parser.fail(ERROR_RESPONSE["response"])
+        yield {"type": "error", "content": parser.raw}
+
+# Context window settings: number of user/assistant turns kept verbatim, how many more may pile up
+# before they are folded into the running summary in one batch, token budget for the verbatim turns
+# and the model used for the summary.
+CONTEXT_KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", "6"))
+CONTEXT_FOLD_TURNS = int(os.getenv("CONTEXT_FOLD_TURNS", "4"))
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+CONTEXT_SUMMARY_MODEL = os.getenv("CONTEXT_SUMMARY_MODEL", "gpt-4o-mini")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text for gpt-4o, estimating if tiktoken is not available.
+    """
+    if _token_encoding is not None:
+        return len(_token_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def messages_to_fold(messages: List[str]) -> int:
+    """
+    Return how many leading messages should be folded into the running summary.
+
+    Nothing is folded while the history holds at most CONTEXT_KEEP_TURNS + CONTEXT_FOLD_TURNS
+    turns besides the opening message and a new user message, and fits CONTEXT_MAX_TOKENS. Past
+    that it is folded in one go down to the last CONTEXT_KEEP_TURNS turns, and fewer if they
+    exceed CONTEXT_MAX_TOKENS, so the summary is updated once every few turns rather than every turn.
+    The count is always even so the kept history still starts with an assistant message, which
+    build_chat_messages relies on.
+    """
+    tokens = sum(count_tokens(msg) for msg in messages)
+    if len(messages) <= 2 * (CONTEXT_KEEP_TURNS + CONTEXT_FOLD_TURNS) + 2 and tokens <= CONTEXT_MAX_TOKENS:
+        return 0
+    fold = max(0, len(messages) - (2 * CONTEXT_KEEP_TURNS + 1))
+    fold -= fold % 2
+    tokens -= sum(count_tokens(msg) for msg in messages[:fold])
+    while tokens > CONTEXT_MAX_TOKENS and fold + 2 < len(messages):
+        tokens -= count_tokens(messages[fold]) + count_tokens(messages[fold + 1])
+        fold += 2
+    return fold
+
+
+def build_context(system_message: str, summary: Optional[str], agenda: List[str]) -> str:
+    """
+    Extend the system message with the running summary and the current agenda.
+    """
+    parts = [system_message]
+    if summary:
+        parts.append(f"Summary of the earlier conversation:\n{summary}")
+    if agenda:
+        parts.append("Current agenda:\n<agenda>\n" + ", ".join(json.dumps(item) for item in agenda) + "\n</agenda>")
+    return "\n\n".join(parts)
+
+
+async def summarize_messages(summary: Optional[str], messages: List[str], priority: Priority = Priority.INTERACTIVE) -> Optional[str]:
+    """
+    Fold messages (alternating assistant/user, starting with the assistant) into the running summary.
+    Returns None if the summary could not be generated, in which case the messages should be kept.
+    """
+    transcript = "\n".join(
+        f"{'Assistant' if i % 2 == 0 else 'User'}: {msg}" for i, msg in enumerate(messages)
+    )
+    try:
+        summary_messages = [
+            {"role": "system", "content": "You maintain a running summary of a meeting preparation conversation. "
+                "Merge the new messages into the existing summary. Keep what the user wants to raise, decisions "
+                "and open questions. Leave out the agenda itself, it is tracked separately. Be concise."},
+            {"role": "user", "content": f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"}
+        ]
+        response = await scheduler.call(
+            CONTEXT_SUMMARY_MODEL,
+            lambda: async_client.chat.completions.create(
+                model=CONTEXT_SUMMARY_MODEL,
+                messages=summary_messages,
+                temperature=0,
+                max_tokens=300
+            ),
+            tokens=sum(count_tokens(msg["content"]) for msg in summary_messages) + 300,
+            priority=priority
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        logger.error("Error in conversation summarization: %s", e)
+        return None
+
 if __name__ == "__main__":
     # Test data
     test_meeting_description = "Daily Scrum Meeting. Everybody should be prepared to talk about their progress and any issues they are facing."
@@ -140,57 +588,174 @@ if __name__ == "__main__":
 
     print("Conversation ended.")
 
-async def convert_audio_to_text(audio_file: UploadFile):
+async def transcribe_file(audio_path: str, filename: str) -> str:
     """
-    Convert an uploaded audio file to text using OpenAI's Whisper model.
+    Transcribe a single audio file with Whisper. The file is passed by path so retries re-read it.
     """
-    try:
-        # Read the file content
-        file_content = await audio_file.read()
-        
-        # Create a file-like object from the content
-        audio_file_obj = io.BytesIO(file_content)
-        audio_file_obj.name = audio_file.filename  # Set the filename
-
-        # Call the OpenAI API to transcribe the audio
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file_obj,
+    return await scheduler.call(
+        TRANSCRIPTION_MODEL,
+        lambda: async_client.audio.transcriptions.create(
+            model=TRANSCRIPTION_MODEL,
+            file=(filename, Path(audio_path)),
             response_format="text"
         )
+    )
+
+async def convert_audio_to_text(audio_path: str, filename: str):
+    """
+    Convert an audio file to text using OpenAI's Whisper model.
+
+    Recordings that are too large for Whisper or longer than AUDIO_CHUNK_SECONDS are split at
+    silences, transcribed in parallel and joined in order.
+    """
+    chunk_paths = []
+    try:
+        size = os.path.getsize(audio_path)
+        if ffmpeg_available():
+            duration = await probe_duration(audio_path)
+            if duration is not None and (duration > AUDIO_CHUNK_SECONDS or size > WHISPER_MAX_BYTES):
+                chunk_paths = await split_audio(audio_path, duration, target=min(AUDIO_CHUNK_SECONDS, duration))
+        elif size > WHISPER_MAX_BYTES:
+            logger.error("Error in audio transcription: file exceeds the Whisper limit and ffmpeg is not available to split it")
+            return None
 
-        return transcript
+        if not chunk_paths:
+            return await transcribe_file(audio_path, filename)
+        transcripts = await asyncio.gather(*[transcribe_file(chunk_path, os.path.basename(chunk_path)) for chunk_path in chunk_paths])
+        return " ".join(transcript.strip() for transcript in transcripts if transcript)
     except Exception as e:
-        print(f"Error in audio transcription: {str(e)}")
+        logger.error("Error in audio transcription: %s", e)
         return None
+    finally:
+        for chunk_path in chunk_paths:
+            os.unlink(chunk_path)
+
+# Speculative synthesis tasks by cache key, so a replay request can wait for one still running
+_synthesis_tasks: Dict[str, asyncio.Task] = {}
+
+# Text and voice of speculative syntheses by cache key. The tasks above are per process; with the
+# SQLite backend (default) this is shared by the workers of a host, so a replay that reaches a
+# worker other than the one synthesizing can still produce the audio.
+speech_requests = ResponseCache(create_store(
+    os.getenv("SPEECH_REQUESTS", "sqlite"),
+    path=os.getenv("SPEECH_REQUESTS_PATH", os.getenv("RESPONSE_CACHE_PATH", "./response_cache.db")),
+    table="speech_requests",
+    ttl=float(os.getenv("SPEECH_REQUESTS_TTL", str(60 * 60))),
+    max_entries=int(os.getenv("SPEECH_REQUESTS_MAX_ENTRIES", "10000"))
+))
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split a reply into sentences and lines for speech synthesis. Numbered agenda lines ("1. ...") stay whole.
+    """
+    return [sentence.strip() for sentence in re.split(r"(?<=[^\d][.!?])\s+|\n+", text) if sentence.strip()]
+
+async def synthesize_to_cache(key: str, text: str, voice: str):
+    try:
+        if audio_cache.contains(key):
+            return
+        # Nobody is waiting yet, so live requests go first
+        response = await scheduler.call(
+            TTS_MODEL,
+            lambda: async_client.audio.speech.create(model=TTS_MODEL, voice=voice, input=text),
+            priority=Priority.BACKGROUND
+        )
+        with audio_cache.writer(key) as cache_file:
+            cache_file.write(response.content)
+    except Exception as e:
+        logger.error("Error in speculative text-to-speech conversion: %s", e)
+
+async def presynthesize_speech(text: str, voice: str = "alloy") -> List[Dict[str, str]]:
+    """
+    Start synthesizing text sentence by sentence in the background and return a handle per
+    sentence. Each handle's url serves the audio once it is ready and waits for it until then.
+    """
+    handles = []
+    for sentence in split_sentences(text):
+        key = audio_cache.make_key(sentence, voice, TTS_MODEL)
+        if key not in _synthesis_tasks and not audio_cache.contains(key):
+            # Recorded before the handle is returned, so any worker can serve it
+            await speech_requests.aset(key, {"text": sentence, "voice": voice})
+            task = asyncio.create_task(synthesize_to_cache(key, sentence, voice))
+            _synthesis_tasks[key] = task
+            task.add_done_callback(lambda _, key=key: _synthesis_tasks.pop(key, None))
+        handles.append({"text": sentence, "key": key, "url": f"/tts/{key}"})
+    return handles
+
+async def wait_for_synthesis(key: str):
+    task = _synthesis_tasks.get(key)
+    if task is not None:
+        await asyncio.shield(task)
+
+async def replay_speech(key: str):
+    """
+    Response for a handle from presynthesize_speech, or None if the key is unknown. Waits for a
+    synthesis running in this process. If another worker is synthesizing it (or the synthesis
+    failed), the recorded text is synthesized here.
+    """
+    await wait_for_synthesis(key)
+    path = audio_cache.get(key)
+    if path is not None:
+        return cached_audio_response(key, path)
+    request = await speech_requests.aget(key)
+    if request is None:
+        return None
+    return await convert_text_to_audio(request["text"], request["voice"])
+
+def cached_audio_response(key: str, path: str) -> FileResponse:
+    """
+    Serve a cached synthesis. FileResponse handles Range requests; the ETag is the cache key.
+    """
+    return FileResponse(
+        path=path,
+        media_type="audio/mpeg",
+        filename="speech.mp3",
+        headers={"ETag": f'"{key}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    )
 
 async def convert_text_to_audio(text: str, voice: str = "alloy"):
     """
-    Convert text to audio using OpenAI's text-to-speech API and return a FastAPI FileResponse.
+    Convert text to audio using OpenAI's text-to-speech API and return a FastAPI response.
+
+    Cached audio is served from disk. On a miss the synthesis is streamed to the client as it
+    arrives and written to the cache at the same time.
     
     :param text: The text to convert to speech
     :param voice: The voice to use (default is "alloy")
-    :return: A FastAPI FileResponse containing the audio file
+    :return: A FileResponse or StreamingResponse containing the audio
     """
+    key = audio_cache.make_key(text, voice, TTS_MODEL)
+    path = audio_cache.get(key)
+    if path is not None:
+        return cached_audio_response(key, path)
+
+    stack = AsyncExitStack()
     try:
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice=voice,
-            input=text
-        )
-        
-        # Create a temporary file to store the audio content
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            temp_file.write(response.content)
-            temp_file_path = temp_file.name
-
-        # Return a FileResponse
-        return FileResponse(
-            path=temp_file_path,
-            media_type="audio/mpeg",
-            filename="speech.mp3",
-            background=BackgroundTask(lambda: os.unlink(temp_file_path))
+        response = await scheduler.call(
+            TTS_MODEL,
+            lambda: stack.enter_async_context(async_client.audio.speech.with_streaming_response.create(
+                model=TTS_MODEL,
+                voice=voice,
+                input=text
+            ))
         )
     except Exception as e:
-        print(f"Error in text-to-speech conversion: {str(e)}")
+        await stack.aclose()
+        logger.error("Error in text-to-speech conversion: %s", e)
         raise HTTPException(status_code=500, detail="Text-to-speech conversion failed")
+
+    async def stream_and_cache():
+        try:
+            # An incomplete stream is discarded by the cache writer
+            with audio_cache.writer(key) as cache_file:
+                async for chunk in response.iter_bytes():
+                    cache_file.write(chunk)
+                    yield chunk
+        finally:
+            await stack.aclose()
+
+    return StreamingResponse(
+        stream_and_cache(),
+        media_type="audio/mpeg",
+        headers={"ETag": f'"{key}"', "Content-Disposition": 'attachment; filename="speech.mp3"'}
+    )
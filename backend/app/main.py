@@ -1,17 +1,44 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .database import engine
-from . import models
-from .routers import meetings, users, tts
+from .migrations import run_migrations
+from . import ai_manager
+from .routers import meetings, users, tts, metrics
+from .util.responses import JSONResponse
+from .util.metrics import MetricsMiddleware, registry
+from .util.compression import CompressionMiddleware
+from .util.response_cache import response_cache
+from .util.audio_cache import audio_cache
+from .util.scheduler import scheduler
+from .util.pubsub import pubsub
+from .util.single_flight import conversation_locks, idempotency_store
+from .util.entity_cache import entity_cache
+from .util.static_files import StaticSite
+import logging
 import os
 
-models.Base.metadata.create_all(bind=engine)
+# Debug logging (prompts, raw completions) is only emitted with LOG_LEVEL=DEBUG
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
+run_migrations(engine)
 
-app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    meetings.conversation_pool.start()
+    meetings.summary_pool.start()
+    yield
+    await meetings.conversation_pool.stop()
+    await meetings.summary_pool.stop()
+    # Release the pooled OpenAI connections
+    await ai_manager.async_client.close()
+
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan, default_response_class=JSONResponse)
 
 origins = [
     "http://localhost:8000",
@@ -23,6 +50,9 @@ URL = os.getenv("URL")
 if URL is not None:
     origins.append(URL)
 
+if os.getenv("COMPRESSION", "true").lower() in ("1", "true", "yes"):
+    app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -35,13 +65,22 @@ app.add_middleware(
 app.include_router(meetings.router, tags=["Meetings"])
 app.include_router(users.router, tags=["Users"])
 app.include_router(tts.router, tags=["TTS"])
+app.include_router(metrics.router)
+
+registry.register_stats("response_cache", response_cache.stats)
+registry.register_stats("entity_cache", entity_cache.stats)
+registry.register_stats("tts_cache", audio_cache.stats)
+registry.register_stats("speech_requests", ai_manager.speech_requests.stats)
+registry.register_stats("openai_scheduler", scheduler.stats)
+registry.register_stats("pubsub", pubsub.stats)
+registry.register_stats("idempotency", idempotency_store.stats)
+registry.register_stats("conversation_locks", conversation_locks.stats)
+registry.register_stats("conversation_prewarm", lambda: {"queue_depth": meetings.conversation_pool.queue_depth})
+registry.register_stats("conversation_summary", lambda: {"queue_depth": meetings.summary_pool.queue_depth})
 
-@app.get("/", include_in_schema=False)
-async def serve_index():
-    index_path = os.path.join("frontend", "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-    raise HTTPException(status_code=404, detail="Index file not found")
+# Indexed once here; restart after replacing the build
+static_site = StaticSite(os.getenv("STATIC_DIR", "frontend"))
+registry.register_stats("static_files", static_site.stats)
 
 @app.get("/api/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
@@ -54,8 +93,8 @@ async def custom_swagger_ui_html():
 async def get_open_api_endpoint():
     return get_openapi(title="API Docs", version="1.0.0", routes=app.routes)
 
-# Serve static files
-app.mount("/", StaticFiles(directory="frontend"), name="static")
+# Serve the frontend build, "/" being its index.html
+app.mount("/", static_site, name="static")
 
 # Make sure to export the 'app' variable
 __all__ = ['app']
\ No newline at end of file
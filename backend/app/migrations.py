@@ -0,0 +1,164 @@
+"""
+Minimal schema migration layer.
+
+Base.metadata.create_all only creates missing tables, it never changes tables that already
+exist in database.db. Changes to existing tables are applied here as numbered migrations,
+and the applied versions are recorded in the schema_migrations table.
+
+Every worker runs the migrations at startup. The pass holds a database-wide lock (BEGIN IMMEDIATE
+on SQLite, an advisory lock on PostgreSQL), so workers starting together run it one after another
+and the later ones find everything applied. Migrations are also written to be safe to re-run.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .agenda import render_message
+from .database import SQLITE_BUSY_TIMEOUT_MS, Base
+from .models import ChatMessage, Conversation, MeetingAgenda
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table("schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime)
+)
+
+# Key of the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_KEY = 4_012_020
+# How long a worker waits for another one's migration pass on SQLite
+MIGRATION_LOCK_TIMEOUT_MS = 600_000
+
+
+def _create_indexes(conn: Connection, *indexes):
+    for index in indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _add_columns(conn: Connection, table: Table, *column_names: str):
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+
+def add_conversation_indexes(conn: Connection):
+    # Racing requests could create several conversations for one (meeting, user) pair, which the
+    # unique index does not allow. Keep the oldest, the one reads returned so far, and move the
+    # others to archive tables together with their own messages and agenda items.
+    duplicates = (
+        "SELECT id FROM conversations WHERE meeting_id IS NOT NULL AND user_id IS NOT NULL "
+        "AND id NOT IN (SELECT MIN(id) FROM conversations GROUP BY meeting_id, user_id)"
+    )
+    (count,) = conn.execute(text(f"SELECT COUNT(*) FROM ({duplicates}) AS duplicates")).one()
+    if count:
+        archived = {}
+        for table, archive, column in (
+            ("chat_messages", "archived_chat_messages", "conversation_id"),
+            ("meeting_agendas", "archived_meeting_agendas", "conversation_id"),
+            ("conversations", "archived_conversations", "id"),
+        ):
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {archive} AS SELECT * FROM {table} WHERE 1 = 0"))
+            conn.execute(text(f"INSERT INTO {archive} SELECT * FROM {table} WHERE {column} IN ({duplicates})"))
+            archived[table] = conn.execute(text(f"DELETE FROM {table} WHERE {column} IN ({duplicates})")).rowcount
+        logger.warning(
+            f"Archived {count} duplicate conversations, keeping the oldest per meeting and user: "
+            f"{archived['conversations']} conversations to archived_conversations, {archived['chat_messages']} messages "
+            f"to archived_chat_messages and {archived['meeting_agendas']} agenda items to archived_meeting_agendas"
+        )
+
+    _create_indexes(
+        conn,
+        *Conversation.__table__.indexes,
+        *ChatMessage.__table__.indexes,
+        *MeetingAgenda.__table__.indexes
+    )
+
+
+def add_conversation_summary(conn: Connection):
+    _add_columns(conn, Conversation.__table__, "summary", "summarized_until_id")
+
+
+def add_chat_message_display_text(conn: Connection):
+    _add_columns(conn, ChatMessage.__table__, "display_message")
+    rows = conn.execute(text("SELECT id, message FROM chat_messages WHERE display_message IS NULL")).all()
+    if rows:
+        conn.execute(
+            text("UPDATE chat_messages SET display_message = :display_message WHERE id = :id"),
+            [{"id": id, "display_message": render_message(message or "")} for id, message in rows]
+        )
+
+
+def add_conversation_started(conn: Connection):
+    _add_columns(conn, Conversation.__table__, "started")
+    # Whether an existing conversation was opened is not recorded; count those with a user message as started
+    conn.execute(text(
+        "UPDATE conversations SET started = EXISTS ("
+        "SELECT 1 FROM chat_messages WHERE chat_messages.conversation_id = conversations.id AND chat_messages.author = 'user'"
+        ") WHERE started IS NULL"
+    ))
+
+
+# (version, description, migration) - append only, never renumber
+MIGRATIONS = [
+    (1, "conversation, chat message and agenda indexes", add_conversation_indexes),
+    (2, "conversation running summary", add_conversation_summary),
+    (3, "pre-rendered chat message display text", add_chat_message_display_text),
+    (4, "conversation started flag", add_conversation_started),
+]
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """
+    Yield a connection in a transaction holding a database-wide lock until it ends.
+    """
+    if engine.dialect.name == "sqlite":
+        # pysqlite does not begin a transaction before DDL, so take the write lock explicitly
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql(f"PRAGMA busy_timeout={MIGRATION_LOCK_TIMEOUT_MS}")
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.exec_driver_sql("ROLLBACK")
+                    raise
+                conn.exec_driver_sql("COMMIT")
+            finally:
+                conn.exec_driver_sql(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    else:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            yield conn
+
+
+def run_migrations(engine: Engine):
+    """
+    Create missing tables and apply all migrations that have not been recorded yet, in one
+    transaction under the migration lock.
+    """
+    with _migration_lock(engine) as conn:
+        Base.metadata.create_all(conn)
+        schema_migrations.create(conn, checkfirst=True)
+        # Read under the lock: another worker may have just applied some
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+        for version, description, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            migration(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.now(timezone.utc)
+            ))
+            logger.info(f"Applied migration {version}: {description}")
@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, Table
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, Table
 from sqlalchemy.orm import relationship
 from .database import Base
+from .agenda import render_message
 
 # Add this association table
 user_meeting = Table('user_meeting', Base.metadata,
@@ -38,36 +39,53 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     meeting_id = Column(Integer, ForeignKey("meetings.id"))
     system_prompt = Column(String, default="Test", nullable=True)
     finished = Column(Boolean, default=False)
+    # Set when the user first opens or messages the conversation; pre-warmed conversations start out False
+    started = Column(Boolean, default=False)
+    # Running summary of the messages up to and including summarized_until_id
+    summary = Column(Text, nullable=True)
+    summarized_until_id = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="conversations")
     meeting = relationship("Meeting", back_populates="conversations")
-    chat_messages = relationship("ChatMessage", back_populates="conversation")  # Changed from 'messages' to 'chat_messages'
+    chat_messages = relationship("ChatMessage", back_populates="conversation", order_by="ChatMessage.id")  # Changed from 'messages' to 'chat_messages'
     meeting_agenda = relationship("MeetingAgenda", back_populates="conversation")
 
+    # One conversation per (meeting, user); also serves lookups by meeting_id alone
+    __table_args__ = (
+        Index("ix_conversations_meeting_id_user_id", "meeting_id", "user_id", unique=True),
+    )
+
+def _render_display_message(context):
+    return render_message(context.get_current_parameters()["message"] or "")
+
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
     id = Column(Integer, primary_key=True, index=True)
     message = Column(String)
+    # Rendered once at insert time (agenda blocks as numbered lists) so reads do no parsing
+    display_message = Column(String, default=_render_display_message)
     author = Column(String)
     timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     conversation_id = Column(Integer, ForeignKey("conversations.id"))
 
     conversation = relationship("Conversation", back_populates="chat_messages")
 
+    # Chat history is read per conversation in timestamp order; also covers the conversation_id FK
+    __table_args__ = (
+        Index("ix_chat_messages_conversation_id_timestamp", "conversation_id", "timestamp"),
+    )
+
 class MeetingAgenda(Base):
     __tablename__ = "meeting_agendas"
 
     id = Column(Integer, primary_key=True, index=True)
     agenda_item = Column(String)
     completed = Column(Boolean, default=False)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"))
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), index=True)
 
     conversation = relationship("Conversation", back_populates="meeting_agenda")
-
-
-
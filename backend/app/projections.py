@@ -0,0 +1,40 @@
+"""
+Column projections for read-only endpoints.
+
+Rows are turned straight into the JSON shape of the response schemas, so these paths skip ORM
+hydration and Pydantic validation. Columns are labelled so they can be combined in one joined query.
+"""
+from .models import ChatMessage, Meeting, MeetingAgenda, User
+
+MEETING_COLUMNS = (
+    Meeting.id.label("meeting_id"),
+    Meeting.title.label("meeting_title"),
+    Meeting.description.label("meeting_description"),
+    Meeting.date.label("meeting_date"),
+    Meeting.meeting_type.label("meeting_type")
+)
+USER_COLUMNS = (User.id.label("user_id"), User.username.label("user_username"))
+CHAT_MESSAGE_COLUMNS = (ChatMessage.id, ChatMessage.display_message, ChatMessage.author, ChatMessage.timestamp)
+AGENDA_COLUMNS = (MeetingAgenda.agenda_item, MeetingAgenda.completed)
+
+def meeting_dict(row) -> dict:
+    """schemas.Meeting"""
+    return {
+        "title": row.meeting_title,
+        "description": row.meeting_description,
+        "date": row.meeting_date,
+        "meeting_type": row.meeting_type,
+        "id": row.meeting_id
+    }
+
+def user_dict(row) -> dict:
+    """schemas.User"""
+    return {"username": row.user_username, "id": row.user_id}
+
+def chat_message_dict(row) -> dict:
+    """schemas.ChatMessage"""
+    return {"id": row.id, "message": row.display_message, "author": row.author, "timestamp": row.timestamp}
+
+def agenda_dict(row) -> dict:
+    """schemas.MeetingAgenda"""
+    return {"agenda_item": row.agenda_item, "completed": row.completed}
@@ -1,257 +1,895 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+import asyncio
+import hashlib
+import json
 import os
 
-from app.routers.users import get_user
-from app.ai_manager import generate_initial_prompt, process_user_message, convert_audio_to_text
+from app.routers.users import get_user_dict
+from app.ai_manager import (
+    generate_initial_prompt, generate_initial_message, process_user_message_async, convert_audio_to_text, stream_user_message, StreamingResponseParser,
+    build_context, messages_to_fold, summarize_messages, presynthesize_speech, ERROR_RESPONSE
+)
 from .. import schemas
-from ..database import get_db
-from ..models import Conversation, Meeting, ChatMessage, MeetingAgenda
+from ..database import get_db, AsyncSessionLocal
+from ..models import Conversation, Meeting, ChatMessage, MeetingAgenda, User, user_meeting
+from ..projections import (
+    AGENDA_COLUMNS, CHAT_MESSAGE_COLUMNS, MEETING_COLUMNS, USER_COLUMNS, agenda_dict, chat_message_dict, meeting_dict, user_dict
+)
+from ..agenda import render_message
 from ..util.openai import init_conversation, generate_response
+from ..util.worker_pool import WorkerPool
+from ..util.scheduler import Priority
+from ..util.audio import AudioTooLarge, InvalidUpload, MAX_AUDIO_SIZE, spool_multipart_file, spool_to_tempfile
+from ..util.responses import JSONResponse, conditional_json, etag_matches, make_etag, not_modified
+from ..util.pubsub import pubsub, SubscriptionOverflow
+from ..util.single_flight import IdempotencyConflict, conversation_locks, idempotency_store
+from ..util.entity_cache import entity_cache, meeting_key, members_key, user_key, user_meetings_key
 
 import logging
-import re
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-AUDIO_MIME_TYPES = ["audio/mpeg", "audio/mp3", "audio/wav", "audio/ogg"]
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB in bytes
+AUDIO_MIME_TYPES = ["audio/mpeg", "audio/mp3", "audio/wav", "audio/ogg", "audio/webm", "audio/mp4", "audio/x-m4a"]
+
+# Conversations are created in the background as soon as a user is added to a meeting,
+# so opening the conversation does not wait for the initial LLM call. They count as todo
+# until the user opens them.
+PREWARM_CONVERSATIONS = os.getenv("PREWARM_CONVERSATIONS", "true").lower() in ("1", "true", "yes")
+conversation_pool = WorkerPool(
+    "conversation-prewarm",
+    workers=int(os.getenv("PREWARM_WORKERS", "4")),
+    queue_size=int(os.getenv("PREWARM_QUEUE_SIZE", "1000")),
+    retries=int(os.getenv("PREWARM_RETRIES", "3")),
+    retry_delay=float(os.getenv("PREWARM_RETRY_DELAY", "1.0"))
+)
+
+# Old turns are folded into the running summary after a turn is stored, off the request path
+summary_pool = WorkerPool(
+    "conversation-summary",
+    workers=int(os.getenv("SUMMARY_WORKERS", "2")),
+    queue_size=int(os.getenv("SUMMARY_QUEUE_SIZE", "1000")),
+    retries=int(os.getenv("SUMMARY_RETRIES", "1")),
+    retry_delay=float(os.getenv("SUMMARY_RETRY_DELAY", "1.0"))
+)
+
+# Loader options for endpoints that return a whole conversation
+CONVERSATION_LOADS = (selectinload(Conversation.chat_messages), selectinload(Conversation.meeting_agenda))
 
 # Meeting CRUD operations
-def get_meeting(db: Session, meeting_id: int):
-    return db.query(Meeting).filter(Meeting.id == meeting_id).first()
-
-def get_meetings(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Meeting).offset(skip).limit(limit).all()
-
-def get_conversation(db: Session, meeting_id: int, user_id: int) -> Conversation:
-    return db.query(Conversation).filter(Conversation.meeting_id == meeting_id, Conversation.user_id == user_id).first()
-
-def create_new_conversation(db: Session, meeting_id: int, user_id: int):
-    db_conversation = Conversation(meeting_id=meeting_id, user_id=user_id, system_prompt="")
-    db.add(db_conversation)
-    db.commit() 
-
-    db_conversation = get_conversation(db, meeting_id=meeting_id, user_id=user_id)
+# Relationships are never lazy-loaded on an AsyncSession: pass the loader options a caller needs.
+async def get_meeting(db: AsyncSession, meeting_id: int, options: tuple = ()):
+    result = await db.execute(select(Meeting).filter(Meeting.id == meeting_id).options(*options))
+    return result.scalars().first()
+
+async def get_meeting_dict(db: AsyncSession, meeting_id: int):
+    """
+    Return a meeting in the schemas.Meeting shape, from the entity cache if possible; None if it does not exist.
+    """
+    meeting = await entity_cache.get(meeting_key(meeting_id))
+    if meeting is not None:
+        return meeting
+    generation = await entity_cache.generation()
+    result = await db.execute(select(*MEETING_COLUMNS).filter(Meeting.id == meeting_id))
+    row = result.first()
+    if row is None:
+        return None
+    meeting = meeting_dict(row)
+    await entity_cache.set_many({meeting_key(meeting_id): meeting}, generation)
+    return meeting
+
+async def get_member_ids(db: AsyncSession, meeting_id: int) -> List[int]:
+    result = await db.execute(select(user_meeting.c.user_id).filter(user_meeting.c.meeting_id == meeting_id))
+    return result.scalars().all()
+
+async def get_meetings(db: AsyncSession, skip: int = 0, limit: int = 100):
+    """
+    Return rows of MEETING_COLUMNS ordered by meeting id.
+    """
+    result = await db.execute(select(*MEETING_COLUMNS).order_by(Meeting.id).offset(skip).limit(limit))
+    return result.all()
+
+def conversation_status_column():
+    """
+    Status of an outer-joined Conversation: todo without a conversation or until the user opens
+    it, done once finished.
+    """
+    return case(
+        (Conversation.started.isnot(True), schemas.ConversationStatus.TODO.value),
+        (Conversation.finished.is_(True), schemas.ConversationStatus.DONE.value),
+        else_=schemas.ConversationStatus.IN_PROGRESS.value
+    ).label("conversation_status")
+
+async def get_meetings_with_status(db: AsyncSession, user_id: int, after_id: int = None, limit: int = 100, member_only: bool = False):
+    """
+    Return rows of MEETING_COLUMNS and conversation_status for a user in a single query, ordered by meeting id.
+
+    after_id is a keyset cursor: pass the id of the last meeting of the previous page.
+    """
+    query = select(*MEETING_COLUMNS, conversation_status_column()).outerjoin(
+        Conversation, and_(Conversation.meeting_id == Meeting.id, Conversation.user_id == user_id)
+    )
+    if member_only:
+        query = query.join(user_meeting, and_(user_meeting.c.meeting_id == Meeting.id, user_meeting.c.user_id == user_id))
+    if after_id is not None:
+        query = query.filter(Meeting.id > after_id)
+    result = await db.execute(query.order_by(Meeting.id).limit(limit))
+    return result.all()
+
+async def get_conversation(db: AsyncSession, meeting_id: int, user_id: int, options: tuple = ()) -> Conversation:
+    result = await db.execute(
+        select(Conversation).filter(Conversation.meeting_id == meeting_id, Conversation.user_id == user_id).options(*options)
+    )
+    return result.scalars().first()
+
+async def get_member_statuses(db: AsyncSession, meeting_id: int) -> List[dict]:
+    """
+    Return the conversation status of every member of a meeting in one query.
+    """
+    result = await db.execute(
+        select(user_meeting.c.user_id, conversation_status_column())
+        .outerjoin(Conversation, and_(Conversation.meeting_id == user_meeting.c.meeting_id, Conversation.user_id == user_meeting.c.user_id))
+        .filter(user_meeting.c.meeting_id == meeting_id)
+        .order_by(user_meeting.c.user_id)
+    )
+    return [{"user_id": row.user_id, "conversation_status": row.conversation_status} for row in result]
+
+async def get_meeting_with_users(db: AsyncSession, meeting_id: int):
+    """
+    Project a meeting and its users to the schemas.MeetingSchema shape; None if the meeting does not exist.
+    Served from the entity cache when the meeting, its member ids and those users are all cached,
+    otherwise read in one query that fills the cache.
+    """
+    cached = await entity_cache.get_many([meeting_key(meeting_id), members_key(meeting_id)])
+    meeting, user_ids = cached.get(meeting_key(meeting_id)), cached.get(members_key(meeting_id))
+    if meeting is not None and user_ids is not None:
+        users = await entity_cache.get_many([user_key(user_id) for user_id in user_ids])
+        if len(users) == len(user_ids):
+            return {**meeting, "users": [users[user_key(user_id)] for user_id in user_ids]}
+
+    generation = await entity_cache.generation()
+    result = await db.execute(
+        select(*MEETING_COLUMNS, *USER_COLUMNS)
+        .select_from(Meeting)
+        .outerjoin(user_meeting, user_meeting.c.meeting_id == Meeting.id)
+        .outerjoin(User, User.id == user_meeting.c.user_id)
+        .filter(Meeting.id == meeting_id)
+        .order_by(User.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    meeting = meeting_dict(rows[0])
+    users = [user_dict(row) for row in rows if row.user_id is not None]
+    await entity_cache.set_many({
+        meeting_key(meeting_id): meeting,
+        members_key(meeting_id): [user["id"] for user in users],
+        **{user_key(user["id"]): user for user in users}
+    }, generation)
+    return {**meeting, "users": users}
+
+async def get_conversation_version(db: AsyncSession, meeting_id: int, user_id: int):
+    """
+    Return the conversation's id, system prompt, finished and started flags and last message id
+    in one query; None if it does not exist.
+    """
+    last_message_id = select(func.max(ChatMessage.id)).filter(ChatMessage.conversation_id == Conversation.id).scalar_subquery()
+    result = await db.execute(
+        select(Conversation.id, Conversation.system_prompt, Conversation.finished, Conversation.started, last_message_id.label("last_message_id"))
+        .filter(Conversation.meeting_id == meeting_id, Conversation.user_id == user_id)
+    )
+    return result.first()
+
+def conversation_etag(version, agenda: List[dict]) -> str:
+    # Messages are only ever appended, so the last id versions them; the agenda is rewritten
+    # in place and small, so its items are part of the tag
+    return make_etag(version.id, version.finished, version.last_message_id, [(item["agenda_item"], item["completed"]) for item in agenda])
+
+async def get_conversation_view(db: AsyncSession, meeting_id: int, user_id: int, version=None, agenda: List[dict] = None):
+    """
+    Project a conversation to the schemas.Conversation shape with three queries, whatever its length;
+    None if it does not exist. Pass the version and agenda if they were already read.
+    """
+    row = version or await get_conversation_version(db, meeting_id=meeting_id, user_id=user_id)
+    if row is None:
+        return None
+    messages = await db.execute(
+        select(*CHAT_MESSAGE_COLUMNS).filter(ChatMessage.conversation_id == row.id).order_by(ChatMessage.id)
+    )
+    return {
+        "user_id": user_id,
+        "meeting_id": meeting_id,
+        "chat_messages": [chat_message_dict(message) for message in messages],
+        "meeting_agenda": agenda if agenda is not None else await get_agenda(db, row.id),
+        "system_prompt": row.system_prompt,
+        "finished": row.finished,
+        "audio": []
+    }
+
+async def get_conversation_id(db: AsyncSession, meeting_id: int, user_id: int):
+    result = await db.execute(select(Conversation.id).filter(Conversation.meeting_id == meeting_id, Conversation.user_id == user_id))
+    return result.scalar()
+
+async def release_connection(db: AsyncSession):
+    """
+    End the session's transaction so its connection goes back to the pool while the request waits
+    on OpenAI or a pre-warm job. Loaded objects stay usable (expire_on_commit=False).
+    """
+    await db.commit()
+
+async def get_agenda(db: AsyncSession, conversation_id: int) -> List[dict]:
+    result = await db.execute(select(*AGENDA_COLUMNS).filter(MeetingAgenda.conversation_id == conversation_id).order_by(MeetingAgenda.id))
+    return [agenda_dict(row) for row in result]
+
+async def create_new_conversation(db: AsyncSession, meeting_id: int, user_id: int, raise_on_error: bool = False, priority: Priority = Priority.INTERACTIVE, started: bool = True):
+    meeting = await get_meeting_dict(db, meeting_id=meeting_id)
+    user = await get_user_dict(db, user_id=user_id)
     
-    logger.debug(f"Generating initial prompt for meeting_id: {meeting_id}, user_id: {user_id}")
-    logger.debug(f"Meeting description: {db_conversation.meeting.description}")
-    logger.debug(f"User username: {db_conversation.user.username}")
+    logger.debug("Generating initial prompt for meeting_id: %s, user_id: %s", meeting_id, user_id)
+    logger.debug("Meeting description: %s", meeting["description"])
+    logger.debug("User username: %s", user["username"])
     
-    prompt = generate_initial_prompt(db_conversation.meeting.title, db_conversation.meeting.description, db_conversation.user.username)
-    logger.debug(f"Generated initial prompt: {prompt}")
+    prompt = generate_initial_prompt(meeting["title"], meeting["description"], user["username"])
+    logger.debug("Generated initial prompt: %s", prompt)
     
-    db_conversation.system_prompt = prompt
-    initial_message = process_user_message(prompt, [])
-    logger.debug(f"Initial AI response: {initial_message['response']}")
-
+    await release_connection(db)
+    initial_message = await generate_initial_message(meeting["title"], meeting["description"], user["username"], priority=priority)
+    logger.debug("Initial AI response: %s", initial_message["response"])
+    if raise_on_error and initial_message["response"] == ERROR_RESPONSE["response"]:
+        raise RuntimeError("Failed to generate the initial message")
+
+    # The conversation and its first message are stored together, so a conversation is never visible without it
+    db_conversation = Conversation(meeting_id=meeting_id, user_id=user_id, system_prompt=prompt, started=started)
     db_conversation.chat_messages = [ChatMessage(message=initial_message["response"], author="assistant", timestamp=datetime.now())]
     db.add(db_conversation)
-    db.commit() 
-    db.refresh(db_conversation)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Created concurrently by another request or the pre-warm worker
+        await db.rollback()
+        return await get_conversation(db, meeting_id=meeting_id, user_id=user_id, options=CONVERSATION_LOADS)
+    await db.refresh(db_conversation, attribute_names=["chat_messages", "meeting_agenda"])
+    await publish_messages(meeting_id, user_id, db_conversation.chat_messages)
+    if started:
+        await publish_status(meeting_id, user_id, schemas.ConversationStatus.IN_PROGRESS)
     return db_conversation
 
-def update_conversation(db: Session, conversation: schemas.Conversation):
-    db_conversation = get_conversation(db, meeting_id=conversation.meeting_id, user_id=conversation.user_id)
+async def mark_conversation_started(db: AsyncSession, meeting_id: int, user_id: int, conversation_id: int):
+    """
+    Flag a pre-warmed conversation as started when the user first opens it.
+    """
+    result = await db.execute(
+        update(Conversation).where(Conversation.id == conversation_id, Conversation.started.isnot(True)).values(started=True)
+    )
+    await db.commit()
+    if result.rowcount:
+        await publish_status(meeting_id, user_id, schemas.ConversationStatus.IN_PROGRESS)
+
+async def prewarm_conversation(meeting_id: int, user_id: int):
+    async with AsyncSessionLocal() as db:
+        if await get_conversation(db, meeting_id=meeting_id, user_id=user_id) is None:
+            await create_new_conversation(db, meeting_id=meeting_id, user_id=user_id, raise_on_error=True, priority=Priority.BACKGROUND, started=False)
+
+def enqueue_conversation_prewarm(meeting_id: int, user_id: int):
+    if PREWARM_CONVERSATIONS:
+        conversation_pool.submit((meeting_id, user_id), prewarm_conversation, meeting_id, user_id)
+
+# Push channels: per conversation (new messages, agenda, status) and per meeting (members' status)
+def conversation_channel(meeting_id: int, user_id: int) -> str:
+    return f"conversation:{meeting_id}:{user_id}"
+
+def meeting_channel(meeting_id: int) -> str:
+    return f"meeting:{meeting_id}"
+
+async def publish_status(meeting_id: int, user_id: int, status: schemas.ConversationStatus):
+    event = {"type": "status", "meeting_id": meeting_id, "user_id": user_id, "conversation_status": status.value}
+    await pubsub.publish(meeting_channel(meeting_id), event)
+    await pubsub.publish(conversation_channel(meeting_id, user_id), event)
+
+async def publish_messages(meeting_id: int, user_id: int, messages: List[ChatMessage]):
+    await pubsub.publish(conversation_channel(meeting_id, user_id), jsonable_encoder({
+        "type": "messages",
+        "chat_messages": [chat_message_dict(message) for message in messages]
+    }))
+
+async def publish_agenda(meeting_id: int, user_id: int, agenda: List[dict]):
+    await pubsub.publish(conversation_channel(meeting_id, user_id), {"type": "agenda", "meeting_agenda": agenda})
+
+async def publish_turn(db_conversation: Conversation, messages: List[ChatMessage], assistant_response: dict, was_finished: bool, was_started: bool = True):
+    """
+    Push a committed turn: the new messages, the agenda if it changed and the status transitions.
+    """
+    meeting_id, user_id = db_conversation.meeting_id, db_conversation.user_id
+    if not was_started:
+        await publish_status(meeting_id, user_id, schemas.ConversationStatus.IN_PROGRESS)
+    await publish_messages(meeting_id, user_id, messages)
+    if assistant_response.get("agenda"):
+        await publish_agenda(meeting_id, user_id, [{"agenda_item": item, "completed": False} for item in assistant_response["agenda"]])
+    if db_conversation.finished and not was_finished:
+        await publish_status(meeting_id, user_id, schemas.ConversationStatus.DONE)
+
+async def update_conversation(db: AsyncSession, conversation: schemas.Conversation):
+    db_conversation = await get_conversation(db, meeting_id=conversation.meeting_id, user_id=conversation.user_id, options=CONVERSATION_LOADS)
     db_conversation.chat_messages = conversation.chat_messages
     db_conversation.meeting_agenda = conversation.meeting_agenda
-    db.commit()
-    db.refresh(db_conversation)
+    await db.commit()
+    await db.refresh(db_conversation, attribute_names=["chat_messages", "meeting_agenda"])
     return db_conversation
 
-def add_message(db: Session, meeting_id: int, user_id: int, message: schemas.ChatMessage):
-    db_conversation = get_conversation(db, meeting_id=meeting_id, user_id=user_id)
-    if db_conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-    db_conversation.chat_messages.append(message)
-
-    # Convert chat_messages to a list of strings
-    chat_history = [msg.message for msg in db_conversation.chat_messages]
-
-    assistant_response = process_user_message(db_conversation.system_prompt, chat_history)
-
+async def get_chat_history(db: AsyncSession, conversation_id: int, after_id: int = None):
+    """
+    Return (id, message) rows of a conversation in order, without hydrating ChatMessage objects.
+    """
+    query = select(ChatMessage.id, ChatMessage.message).filter(ChatMessage.conversation_id == conversation_id)
+    if after_id is not None:
+        query = query.filter(ChatMessage.id > after_id)
+    result = await db.execute(query.order_by(ChatMessage.id))
+    return result.all()
+
+async def build_conversation_context(db: AsyncSession, db_conversation: Conversation, message: str):
+    """
+    Return the system message and the verbatim history to send for the next turn.
+
+    Only messages after the running summary are read. Folding old turns into the summary is
+    normally done by fold_conversation_history after the turn; only if that has fallen behind
+    are they folded here, into db_conversation.summary, and the caller commits the change.
+    The connection is released once everything is read, so the caller can go on to call OpenAI.
+    """
+    rows = await get_chat_history(db, db_conversation.id, after_id=db_conversation.summarized_until_id)
+    agenda = [item["agenda_item"] for item in await get_agenda(db, db_conversation.id)]
+    await release_connection(db)
+    history = [msg for _, msg in rows] + [message]
+
+    fold = messages_to_fold(history)
+    if fold:
+        summary = await summarize_messages(db_conversation.summary, history[:fold])
+        if summary is not None:
+            db_conversation.summary = summary
+            db_conversation.summarized_until_id = rows[fold - 1][0]
+            history = history[fold:]
+
+    return build_context(db_conversation.system_prompt, db_conversation.summary, agenda), history
+
+async def fold_conversation_history(conversation_id: int):
+    """
+    Fold the oldest turns of a conversation into its running summary once enough have piled up.
+    The summary is only stored if no turn has moved it on in the meantime.
+    """
+    async with AsyncSessionLocal() as db:
+        db_conversation = await db.get(Conversation, conversation_id)
+        if db_conversation is None:
+            return
+        summarized_until_id = db_conversation.summarized_until_id
+        rows = await get_chat_history(db, conversation_id, after_id=summarized_until_id)
+        await release_connection(db)
+        fold = messages_to_fold([msg for _, msg in rows])
+        if not fold:
+            return
+        summary = await summarize_messages(db_conversation.summary, [msg for _, msg in rows[:fold]], priority=Priority.BACKGROUND)
+        if summary is None:
+            raise RuntimeError(f"Failed to summarize conversation {conversation_id}")
+        unchanged = (
+            Conversation.summarized_until_id.is_(None) if summarized_until_id is None
+            else Conversation.summarized_until_id == summarized_until_id
+        )
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id, unchanged)
+            .values(summary=summary, summarized_until_id=rows[fold - 1][0])
+        )
+        await db.commit()
+
+def enqueue_history_fold(conversation_id: int, history: List[str]):
+    """
+    Queue a fold if history, the unsummarized messages including the turn just stored, needs one.
+    """
+    if messages_to_fold(history):
+        summary_pool.submit(("summary", conversation_id), fold_conversation_history, conversation_id)
+
+async def get_messages(db: AsyncSession, conversation_id: int, after_id: int = None, limit: int = None) -> List[dict]:
+    """
+    Return the messages of a conversation ordered by id, projected to the schemas.ChatMessage shape.
+    after_id is a keyset cursor (the last message id the client has).
+    """
+    query = select(*CHAT_MESSAGE_COLUMNS).filter(ChatMessage.conversation_id == conversation_id)
+    if after_id is not None:
+        query = query.filter(ChatMessage.id > after_id)
+    query = query.order_by(ChatMessage.id)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return [chat_message_dict(row) for row in result]
+
+async def get_conversation_delta(db: AsyncSession, db_conversation: Conversation, after_id: int = None, audio: list = None):
+    return {
+        "chat_messages": await get_messages(db, db_conversation.id, after_id=after_id),
+        "meeting_agenda": await get_agenda(db, db_conversation.id),
+        "finished": db_conversation.finished,
+        "audio": audio or []
+    }
+
+async def presynthesize_reply(assistant_response: dict, voice: str):
+    """
+    Voice mode: start synthesizing the reply as it will be displayed and return the audio handles.
+    """
+    return [schemas.AudioHandle(**handle) for handle in await presynthesize_speech(render_message(assistant_response["response"]), voice)]
+
+def request_fingerprint(*values) -> str:
+    return hashlib.sha256(json.dumps(values).encode("utf-8")).hexdigest()
+
+async def submit_once(endpoint: str, meeting_id: int, user_id: int, idempotency_key: Optional[str], fingerprint: Optional[str], func):
+    """
+    Run func once per request. With an Idempotency-Key, retries get the stored result without
+    calling the LLM again. Without one, identical requests (same fingerprint) only share the
+    result while the first is still running, which covers double submits; a fingerprint of
+    None disables that.
+    """
+    if idempotency_key:
+        key, remember = (endpoint, meeting_id, user_id, idempotency_key), True
+    elif fingerprint is not None:
+        key, remember = (endpoint, meeting_id, user_id, None, fingerprint), False
+    else:
+        return await func()
+    try:
+        return await idempotency_store.run(key, fingerprint, func, remember=remember)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+async def add_message(db: AsyncSession, meeting_id: int, user_id: int, message: str):
+    """
+    Append a user message and the assistant's reply. Only the new rows are inserted; the
+    conversation's chat_messages collection is never loaded. Returns the conversation, the
+    stored user message and the assistant's response.
+
+    Turns of a conversation run one at a time, so a reply always sees the previous turn. The user
+    message is created inside the turn, so concurrent messages are stored in the order they run.
+    """
+    async with conversation_locks.hold((meeting_id, user_id)):
+        db_conversation = await get_conversation(db, meeting_id=meeting_id, user_id=user_id)
+        if db_conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        user_message = ChatMessage(message=message, author="user", timestamp=datetime.now(), conversation_id=db_conversation.id)
+        system_message, chat_history = await build_conversation_context(db, db_conversation, message)
+
+        assistant_response = await process_user_message_async(system_message, chat_history)
+        db.add(user_message)
+        was_finished, was_started = db_conversation.finished, db_conversation.started
+        db_conversation.started = True
+        assistant_message = await apply_assistant_response(db, db_conversation, assistant_response)
+
+        await db.commit()
+    enqueue_history_fold(db_conversation.id, chat_history + [assistant_response["response"]])
+    await publish_turn(db_conversation, [user_message, assistant_message], assistant_response, was_finished, was_started)
+    return db_conversation, user_message, assistant_response
+
+async def apply_assistant_response(db: AsyncSession, db_conversation: Conversation, assistant_response: dict):
     # Add the assistant's response as a new ChatMessage
-    db_conversation.chat_messages.append(ChatMessage(
+    assistant_message = ChatMessage(
         message=assistant_response["response"],
         author="assistant",
-        timestamp=datetime.now()
-    ))
+        timestamp=datetime.now(),
+        conversation_id=db_conversation.id
+    )
+    db.add(assistant_message)
 
     # Create MeetingAgenda objects only if agenda exists and is not empty
     if "agenda" in assistant_response and assistant_response["agenda"]:
         # Delete existing agenda items
-        db.query(MeetingAgenda).filter(MeetingAgenda.conversation_id == db_conversation.id).delete()
+        await db.execute(delete(MeetingAgenda).filter(MeetingAgenda.conversation_id == db_conversation.id))
         
         # Add new agenda items
         for agenda_item in assistant_response["agenda"]:
-            db_conversation.meeting_agenda.append(MeetingAgenda(
+            db.add(MeetingAgenda(
                 agenda_item=agenda_item,
-                completed=False
+                completed=False,
+                conversation_id=db_conversation.id
             ))
 
     if "conversation_ended" in assistant_response and assistant_response["conversation_ended"]:
         db_conversation.finished = True
-        
-    db.commit()
-    db.refresh(db_conversation)
-    return db_conversation
-    
+    return assistant_message
 
-def create_meeting(db: Session, meeting: schemas.MeetingCreate):
+async def create_meeting(db: AsyncSession, meeting: schemas.MeetingCreate):
     db_meeting = Meeting(**meeting.model_dump())
     db.add(db_meeting)
-    db.commit()
-    db.refresh(db_meeting)
+    await db.commit()
+    await db.refresh(db_meeting)
     return db_meeting
 
-def update_meeting(db: Session, meeting_id: int, meeting: schemas.MeetingCreate):
-    db_meeting = get_meeting(db, meeting_id)
+async def update_meeting(db: AsyncSession, meeting_id: int, meeting: schemas.MeetingCreate):
+    db_meeting = await get_meeting(db, meeting_id)
     if db_meeting:
         for key, value in meeting.dict().items():
             setattr(db_meeting, key, value)
-        db.commit()
-        db.refresh(db_meeting)
+        await db.commit()
+        await entity_cache.invalidate([meeting_key(meeting_id)])
+        await db.refresh(db_meeting)
     return db_meeting
 
-def delete_meeting(db: Session, meeting_id: int):
-    db_meeting = get_meeting(db, meeting_id)
+async def delete_meeting(db: AsyncSession, meeting_id: int):
+    db_meeting = await get_meeting(db, meeting_id)
     if db_meeting:
-        db.delete(db_meeting)
-        db.commit()
-    return db_meeting 
+        user_ids = await get_member_ids(db, meeting_id)
+        await db.delete(db_meeting)
+        await db.commit()
+        await entity_cache.invalidate([meeting_key(meeting_id), members_key(meeting_id), *(user_meetings_key(user_id) for user_id in user_ids)])
+    return db_meeting
 
 # Meeting CRUD endpoints
 @router.post("/meetings/", response_model=schemas.Meeting)
-def create_meeting_route(meeting: schemas.MeetingCreate, db: Session = Depends(get_db)):
-    return create_meeting(db=db, meeting=meeting)
+async def create_meeting_route(meeting: schemas.MeetingCreate, db: AsyncSession = Depends(get_db)):
+    # A new meeting has no members yet; conversations are pre-warmed as users are added
+    return await create_meeting(db=db, meeting=meeting)
 
 @router.get("/meetings/", response_model=List[schemas.Meeting])
-def read_meetings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    meetings = get_meetings(db, skip=skip, limit=limit)
-    return meetings
+async def read_meetings(skip: int = 0, limit: int = 100, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+    rows = await get_meetings(db, skip=skip, limit=limit)
+    etag = make_etag(*rows)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return conditional_json([meeting_dict(row) for row in rows], etag)
 
 @router.get("/meetings/by_user/{user_id}", response_model=List[schemas.MeetingStatusUser])
-def read_meetings_by_user(user_id: int, db: Session = Depends(get_db)):
-    status_meetings = []
-    meetings = get_meetings(db)
-    for meeting in meetings:
-        conversation = get_conversation(db, meeting_id=meeting.id, user_id=user_id)
-        if conversation is None:
-            meeting_status = "todo"
-        else:
-            if conversation.finished:
-                meeting_status = "done"
-            else:
-                meeting_status = "in_progress"
-        status_meetings.append(schemas.MeetingStatusUser(conversation_status=meeting_status, meeting=meeting))
-    return status_meetings
+async def read_meetings_by_user(
+    user_id: int,
+    after_id: int = None,
+    limit: int = 100,
+    member_only: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    rows = await get_meetings_with_status(db, user_id=user_id, after_id=after_id, limit=limit, member_only=member_only)
+    # Meetings have no version column; tag the rows themselves, which still skips building and sending the body
+    etag = make_etag(*rows)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return conditional_json([{"conversation_status": row.conversation_status, "meeting": meeting_dict(row)} for row in rows], etag)
 
 @router.get("/meetings/{meeting_id}", response_model=schemas.MeetingSchema)
-def read_meeting_route(meeting_id: int, db: Session = Depends(get_db)):
-    db_meeting = get_meeting(db, meeting_id=meeting_id)
-    if db_meeting is None:
+async def read_meeting_route(meeting_id: int, db: AsyncSession = Depends(get_db)):
+    meeting = await get_meeting_with_users(db, meeting_id=meeting_id)
+    if meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    return db_meeting
+    return JSONResponse(meeting)
 
 @router.put("/meetings/{meeting_id}", response_model=schemas.Meeting)
-def update_meeting_route(meeting_id: int, meeting: schemas.MeetingCreate, db: Session = Depends(get_db)):
-    db_meeting = update_meeting(db, meeting_id=meeting_id, meeting=meeting)
+async def update_meeting_route(meeting_id: int, meeting: schemas.MeetingCreate, db: AsyncSession = Depends(get_db)):
+    db_meeting = await update_meeting(db, meeting_id=meeting_id, meeting=meeting)
     if db_meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
     return db_meeting
 
 @router.post("/meetings/{meeting_id}/add_user", response_model=schemas.MeetingSchema)
-def add_user_to_meeting(meeting_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_meeting = get_meeting(db, meeting_id=meeting_id)
-    if db_meeting is None:
+async def add_user_to_meeting(meeting_id: int, user_id: int, db: AsyncSession = Depends(get_db)):
+    if await get_meeting_dict(db, meeting_id=meeting_id) is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    db_user = get_user(db, user_id=user_id)
-    if db_user is None:
+    if await get_user_dict(db, user_id=user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if db_user in db_meeting.users:
+    # Insert the membership row directly instead of loading every member; the primary key rejects duplicates
+    try:
+        await db.execute(insert(user_meeting).values(meeting_id=meeting_id, user_id=user_id))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(status_code=400, detail="User already in meeting")
-    
-    db_meeting.users.append(db_user)
-    db.commit()
-    db.refresh(db_meeting)
-    return db_meeting
+    await entity_cache.invalidate([members_key(meeting_id), user_meetings_key(user_id)])
+    await publish_status(meeting_id, user_id, schemas.ConversationStatus.TODO)
+    enqueue_conversation_prewarm(meeting_id, user_id)
+    return JSONResponse(await get_meeting_with_users(db, meeting_id=meeting_id))
 
 
 @router.delete("/meetings/{meeting_id}", response_model=schemas.Meeting)
-def delete_meeting_route(meeting_id: int, db: Session = Depends(get_db)):
-    db_meeting = delete_meeting(db, meeting_id=meeting_id)
+async def delete_meeting_route(meeting_id: int, db: AsyncSession = Depends(get_db)):
+    db_meeting = await delete_meeting(db, meeting_id=meeting_id)
     if db_meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
     return db_meeting
 
 
 @router.get("/meetings/{meeting_id}/{user_id}/conversation", response_model=schemas.Conversation)
-def create_conversation(meeting_id: int, user_id: int, db: Session = Depends(get_db)):
-    if get_meeting(db, meeting_id=meeting_id) is None:
+async def create_conversation(meeting_id: int, user_id: int, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+    # Existing conversation (the common case): read-only projection, no existence checks needed.
+    # Polls of an unchanged conversation get a 304 before the messages are read.
+    version = await get_conversation_version(db, meeting_id=meeting_id, user_id=user_id)
+    if version is not None:
+        if not version.started:
+            await mark_conversation_started(db, meeting_id, user_id, version.id)
+        agenda = await get_agenda(db, version.id)
+        etag = conversation_etag(version, agenda)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return conditional_json(await get_conversation_view(db, meeting_id, user_id, version=version, agenda=agenda), etag)
+
+    if await get_meeting_dict(db, meeting_id=meeting_id) is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    if get_user(db, user_id=user_id) is None:
+    if await get_user_dict(db, user_id=user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")   
-    if get_conversation(db, meeting_id=meeting_id, user_id=user_id) is None:
-        db_conversation = create_new_conversation(db, meeting_id=meeting_id, user_id=user_id)
-    else:
-        db_conversation = get_conversation(db, meeting_id=meeting_id, user_id=user_id)
+    db_conversation = await get_conversation(db, meeting_id=meeting_id, user_id=user_id, options=CONVERSATION_LOADS)
+    if db_conversation is None:
+        # Still being pre-warmed: wait for it instead of making a second LLM call
+        pending = conversation_pool.pending((meeting_id, user_id))
+        if pending is not None:
+            await release_connection(db)
+            # Shielded: a client disconnecting here must not cancel the job's future for other waiters
+            await asyncio.shield(pending)
+            db_conversation = await get_conversation(db, meeting_id=meeting_id, user_id=user_id, options=CONVERSATION_LOADS)
+    if db_conversation is None:
+        db_conversation = await create_new_conversation(db, meeting_id=meeting_id, user_id=user_id)
+    if not db_conversation.started:
+        # Pre-warmed, or pre-warmed concurrently with create_new_conversation
+        await mark_conversation_started(db, meeting_id, user_id, db_conversation.id)
 
-    db_conversation.chat_messages = extract_and_format_agenda(db_conversation.chat_messages)
     return db_conversation
 
+async def add_message_response(db: AsyncSession, meeting_id: int, user_id: int, message: str, voice_mode: bool, voice: str) -> schemas.Conversation:
+    ret, _, assistant_response = await add_message(db, meeting_id=meeting_id, user_id=user_id, message=message)
+    await db.refresh(ret, attribute_names=["chat_messages", "meeting_agenda"])
+    conversation = schemas.Conversation.model_validate(ret, from_attributes=True)
+    if voice_mode:
+        conversation.audio = await presynthesize_reply(assistant_response, voice)
+    return conversation
+
 @router.post("/meetings/{meeting_id}/{user_id}/conversation/message", response_model=schemas.Conversation)
-def router_add_message(meeting_id: int, user_id: int, message: str, db: Session = Depends(get_db)):
-    ret = add_message(db, meeting_id=meeting_id, user_id=user_id, message=ChatMessage(message=message, author="user", timestamp=datetime.now()))
+async def router_add_message(
+    meeting_id: int,
+    user_id: int,
+    message: str,
+    voice_mode: bool = False,
+    voice: str = "alloy",
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    return await submit_once(
+        "message", meeting_id, user_id, idempotency_key, request_fingerprint(message, voice_mode, voice),
+        lambda: add_message_response(db, meeting_id, user_id, message, voice_mode, voice)
+    )
+
+@router.post("/meetings/{meeting_id}/{user_id}/conversation/messages", response_model=schemas.ConversationDelta)
+async def router_append_message(
+    meeting_id: int,
+    user_id: int,
+    message: str,
+    after_id: int = None,
+    voice_mode: bool = False,
+    voice: str = "alloy",
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Append a message and return only what changed: the messages after the client's cursor
+    (the new user and assistant messages if no cursor is given), the agenda and the finished flag.
+    With voice_mode, the reply is synthesized in the background and audio handles are included.
+    """
+    async def append():
+        db_conversation, user_message, assistant_response = await add_message(db, meeting_id=meeting_id, user_id=user_id, message=message)
+        audio = await presynthesize_reply(assistant_response, voice) if voice_mode else []
+        delta = await get_conversation_delta(
+            db, db_conversation, after_id=user_message.id - 1 if after_id is None else after_id, audio=audio
+        )
+        return schemas.ConversationDelta.model_validate(delta, from_attributes=True)
 
-    ret.chat_messages = extract_and_format_agenda(ret.chat_messages)
-    return ret
+    return await submit_once(
+        "messages", meeting_id, user_id, idempotency_key, request_fingerprint(message, after_id, voice_mode, voice), append
+    )
 
-@router.post("/meetings/{meeting_id}/{user_id}/conversation/message_audio", response_model=schemas.Conversation)
+@router.get("/meetings/{meeting_id}/{user_id}/conversation/messages", response_model=List[schemas.ChatMessage])
+async def read_conversation_messages(meeting_id: int, user_id: int, after_id: int = None, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    conversation_id = await get_conversation_id(db, meeting_id=meeting_id, user_id=user_id)
+    if conversation_id is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return JSONResponse(await get_messages(db, conversation_id, after_id=after_id, limit=limit))
+
+@router.post("/meetings/{meeting_id}/{user_id}/conversation/message/stream")
+async def router_add_message_stream(
+    meeting_id: int,
+    user_id: int,
+    message: str,
+    voice_mode: bool = False,
+    voice: str = "alloy",
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Stream the assistant's reply as NDJSON events while it is generated.
+
+    Events are {"type": "token"}, {"type": "agenda"} and {"type": "error"}, followed by a final
+    {"type": "done"} carrying the new messages, the agenda and the finished flag. Messages and
+    agenda are only stored once the completion has finished. The turn holds the conversation's
+    lock from reading the history until it is stored, like add_message.
+
+    Retries and double submits are handled like the other message endpoints: a request that
+    shares another one's turn (same Idempotency-Key, or an identical request still running)
+    gets only the final done event.
+    """
+    conversation_id = await get_conversation_id(db, meeting_id=meeting_id, user_id=user_id)
+    if conversation_id is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    await release_connection(db)
+
+    async def stream_turn(events: asyncio.Queue) -> dict:
+        # The request session is not guaranteed to outlive the response, so use our own
+        async with conversation_locks.hold((meeting_id, user_id)):
+            async with AsyncSessionLocal() as stream_db:
+                stream_conversation = await stream_db.get(Conversation, conversation_id)
+                if stream_conversation is None:
+                    raise HTTPException(status_code=404, detail="Conversation not found")
+                system_message, chat_history = await build_conversation_context(stream_db, stream_conversation, message)
+                user_message = ChatMessage(message=message, author="user", timestamp=datetime.now(), conversation_id=conversation_id)
+
+                parser = StreamingResponseParser()
+                async for event in stream_user_message(system_message, chat_history, parser):
+                    events.put_nowait(event)
+
+                stream_db.add(user_message)
+                assistant_response = parser.result()
+                was_finished, was_started = stream_conversation.finished, stream_conversation.started
+                stream_conversation.started = True
+                assistant_message = await apply_assistant_response(stream_db, stream_conversation, assistant_response)
+                await stream_db.commit()
+        enqueue_history_fold(conversation_id, chat_history + [assistant_response["response"]])
+        await publish_turn(stream_conversation, [user_message, assistant_message], assistant_response, was_finished, was_started)
+        audio = await presynthesize_reply(assistant_response, voice) if voice_mode else []
+        async with AsyncSessionLocal() as stream_db:
+            delta = schemas.ConversationDelta.model_validate(
+                await get_conversation_delta(stream_db, stream_conversation, after_id=user_message.id - 1, audio=audio), from_attributes=True
+            )
+        return delta.model_dump(mode="json")
+
+    async def event_stream():
+        # The turn is started here rather than in the route so nothing runs if the stream is never
+        # started. It feeds its events through the queue; None marks the end.
+        events = asyncio.Queue()
+
+        async def run_turn():
+            try:
+                return await submit_once(
+                    "message_stream", meeting_id, user_id, idempotency_key,
+                    request_fingerprint(message, voice_mode, voice), lambda: stream_turn(events)
+                )
+            finally:
+                events.put_nowait(None)
+
+        turn = asyncio.ensure_future(run_turn())
+        try:
+            while (event := await events.get()) is not None:
+                yield json.dumps(event) + "\n"
+            try:
+                conversation = await turn
+            except HTTPException as e:
+                yield json.dumps({"type": "error", "content": e.detail}) + "\n"
+                return
+            yield json.dumps({"type": "done", "conversation": conversation}) + "\n"
+        finally:
+            # The client went away: cancel the turn, a concurrent duplicate takes it over
+            turn.cancel()
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+async def add_audio_message(meeting_id: int, user_id: int, audio_path: str, filename: str, voice_mode: bool, voice: str, db: AsyncSession):
+    try:
+        audio_text = await convert_audio_to_text(audio_path, filename)
+    finally:
+        os.unlink(audio_path)
+    if audio_text is None:
+        raise HTTPException(status_code=500, detail="Failed to transcribe audio file.")
+    
+    return await add_message_response(db, meeting_id, user_id, audio_text, voice_mode, voice)
+
+# The multipart body is parsed by the handler rather than by an UploadFile parameter, so that the
+# size limit applies while it arrives; this documents the form it expects
+AUDIO_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "properties": {"audio_file": {"type": "string", "format": "binary"}},
+            "required": ["audio_file"]
+        }}}
+    }
+}
+
+@router.post("/meetings/{meeting_id}/{user_id}/conversation/message_audio", response_model=schemas.Conversation, openapi_extra=AUDIO_UPLOAD_BODY)
 async def router_add_message_audio(
     meeting_id: int, 
     user_id: int, 
-    audio_file: UploadFile = File(...), 
-    db: Session = Depends(get_db)
+    request: Request,
+    voice_mode: bool = False,
+    voice: str = "alloy",
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Audio message uploaded as the audio_file field of a multipart form. The file is written to
+    disk as it arrives and rejected as soon as it exceeds the size limit.
+    """
+    if await get_conversation(db, meeting_id=meeting_id, user_id=user_id) is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    await release_connection(db)
+
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_AUDIO_SIZE:
+        raise HTTPException(status_code=400, detail=f"File size exceeds the {MAX_AUDIO_SIZE // (1024 * 1024)} MB limit.")
+
+    async def add_upload():
+        try:
+            upload = await spool_multipart_file(
+                request.stream(), request.headers.get("content-type", ""), "audio_file", MAX_AUDIO_SIZE, AUDIO_MIME_TYPES
+            )
+        except AudioTooLarge:
+            raise HTTPException(status_code=400, detail=f"File size exceeds the {MAX_AUDIO_SIZE // (1024 * 1024)} MB limit.")
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await add_audio_message(meeting_id, user_id, upload.path, upload.filename or "audio.mp3", voice_mode, voice, db)
+
+    # Uploads are only de-duplicated by Idempotency-Key; their content is not known up front
+    fingerprint = request_fingerprint(content_length, voice_mode, voice) if idempotency_key else None
+    return await submit_once("message_audio", meeting_id, user_id, idempotency_key, fingerprint, add_upload)
+
+@router.post("/meetings/{meeting_id}/{user_id}/conversation/message_audio_raw", response_model=schemas.Conversation)
+async def router_add_message_audio_raw(
+    meeting_id: int,
+    user_id: int,
+    request: Request,
+    filename: str = "audio.mp3",
+    voice_mode: bool = False,
+    voice: str = "alloy",
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
-    # Check file type
-    if audio_file.content_type not in AUDIO_MIME_TYPES:
+    """
+    Audio message sent as the raw request body (Content-Type: audio/...). The body is written
+    to disk as it arrives and rejected as soon as it exceeds the size limit.
+    """
+    if request.headers.get("content-type", "").split(";")[0].strip() not in AUDIO_MIME_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type. Only audio files are allowed.")
-    
-    # Check file size
-    file_size = await audio_file.read()
-    await audio_file.seek(0)  # Reset file pointer to the beginning
-    if len(file_size) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File size exceeds the 5 MB limit.")
+    if await get_conversation(db, meeting_id=meeting_id, user_id=user_id) is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    await release_connection(db)
 
-    audio_text = await convert_audio_to_text(audio_file)
-    if audio_text is None:
-        raise HTTPException(status_code=500, detail="Failed to transcribe audio file.")
-    
-    return router_add_message(meeting_id, user_id, audio_text, db)
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_AUDIO_SIZE:
+        raise HTTPException(status_code=400, detail=f"File size exceeds the {MAX_AUDIO_SIZE // (1024 * 1024)} MB limit.")
+
+    async def add_body():
+        try:
+            audio_path = await spool_to_tempfile(request.stream(), MAX_AUDIO_SIZE, suffix=os.path.splitext(filename)[1])
+        except AudioTooLarge:
+            raise HTTPException(status_code=400, detail=f"File size exceeds the {MAX_AUDIO_SIZE // (1024 * 1024)} MB limit.")
+        return await add_audio_message(meeting_id, user_id, audio_path, filename, voice_mode, voice, db)
+
+    fingerprint = request_fingerprint(filename, content_length, voice_mode, voice) if idempotency_key else None
+    return await submit_once("message_audio_raw", meeting_id, user_id, idempotency_key, fingerprint, add_body)
 
 @router.delete("/meetings/{meeting_id}/{user_id}/conversation", response_model=schemas.Conversation)
-def delete_conversation(meeting_id: int, user_id: int, db: Session = Depends(get_db)):
-    db_conversation = get_conversation(db, meeting_id=meeting_id, user_id=user_id)
+async def delete_conversation(meeting_id: int, user_id: int, db: AsyncSession = Depends(get_db)):
+    db_conversation = await get_conversation(db, meeting_id=meeting_id, user_id=user_id, options=CONVERSATION_LOADS)
     if db_conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    db.delete(db_conversation)
-    db.commit()
+    await db.delete(db_conversation)
+    await db.commit()
+    await publish_status(meeting_id, user_id, schemas.ConversationStatus.TODO)
     return db_conversation
 
 @router.post("/meetings/{meeting_id}/{user_id}/conversation/update_agenda", response_model=schemas.Conversation)
-def update_agenda(
+async def update_agenda(
     meeting_id: int, 
     user_id: int, 
     agenda: List[schemas.MeetingAgenda], 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_conversation = get_conversation(db, meeting_id=meeting_id, user_id=user_id)
+    db_conversation = await get_conversation(db, meeting_id=meeting_id, user_id=user_id, options=CONVERSATION_LOADS)
     if db_conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
@@ -267,16 +905,69 @@ def update_agenda(
         )
         db_conversation.meeting_agenda.append(new_agenda_item)
     
-    db.commit()
-    db.refresh(db_conversation)
+    await db.commit()
+    await publish_agenda(meeting_id, user_id, [item.model_dump() for item in agenda])
     return db_conversation
 
-def extract_and_format_agenda(messages):
-    for message in messages:
-        agenda_match = re.search(r'<agenda>(.*?)</agenda>', message.message, re.DOTALL)
-        if agenda_match:
-            agenda_content = agenda_match.group(1)
-            agenda_items = [item.strip() for item in agenda_content.split(',')]
-            formatted_agenda = '\n'.join(f"{i+1}. {item}" for i, item in enumerate(agenda_items))
-            message.message = re.sub(r'<agenda>.*?</agenda>', formatted_agenda, message.message, flags=re.DOTALL)
-    return messages
\ No newline at end of file
+async def wait_for_disconnect(websocket: WebSocket):
+    """
+    Read and discard the client's frames (e.g. keepalive pings) until it disconnects.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+async def forward_updates(websocket: WebSocket, subscription):
+    """
+    Send the subscription's messages to the client until it disconnects. A client that falls
+    behind is closed with 1013 and should reconnect to get a fresh snapshot.
+    """
+    disconnected = asyncio.ensure_future(wait_for_disconnect(websocket))
+    try:
+        while True:
+            message = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if message not in done:
+                message.cancel()
+                return
+            try:
+                event = message.result()
+            except SubscriptionOverflow:
+                await websocket.close(code=1013)
+                return
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        if disconnected.done() and not disconnected.cancelled() and disconnected.exception() is not None:
+            logger.debug("Error reading from websocket: %s", disconnected.exception())
+
+@router.websocket("/meetings/{meeting_id}/ws")
+async def meeting_updates(websocket: WebSocket, meeting_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Push the conversation status of the meeting's members. The first message is a snapshot
+    {"type": "snapshot", "members": [...]}, followed by {"type": "status"} events.
+    """
+    await websocket.accept()
+    # Subscribe before reading the snapshot so no update falls in between
+    async with pubsub.subscribe(meeting_channel(meeting_id)) as subscription:
+        members = await get_member_statuses(db, meeting_id)
+        await release_connection(db)
+        await websocket.send_json({"type": "snapshot", "meeting_id": meeting_id, "members": members})
+        await forward_updates(websocket, subscription)
+
+@router.websocket("/meetings/{meeting_id}/{user_id}/conversation/ws")
+async def conversation_updates(websocket: WebSocket, meeting_id: int, user_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Push changes of a conversation. The first message is a snapshot {"type": "snapshot",
+    "conversation": ...} (null if it does not exist yet), followed by {"type": "messages"} with
+    new messages, {"type": "agenda"} with the full agenda and {"type": "status"} transitions.
+    """
+    await websocket.accept()
+    async with pubsub.subscribe(conversation_channel(meeting_id, user_id)) as subscription:
+        conversation = await get_conversation_view(db, meeting_id=meeting_id, user_id=user_id)
+        await release_connection(db)
+        await websocket.send_json(jsonable_encoder({"type": "snapshot", "conversation": conversation}))
+        await forward_updates(websocket, subscription)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..util.metrics import registry
+
+router = APIRouter()
+
+@router.get("/api/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition of this process's metrics.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
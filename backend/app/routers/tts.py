@@ -1,10 +1,38 @@
-from fastapi import APIRouter, Body
-from fastapi.responses import FileResponse
-from app.ai_manager import convert_text_to_audio
+from fastapi import APIRouter, Body, HTTPException, Request, Response
+from app.ai_manager import convert_text_to_audio, replay_speech, TTS_MODEL
+from app.util.audio_cache import audio_cache
+from app.util.responses import etag_matches
+import re
 
 
 router = APIRouter()
 
+def not_modified(request: Request, key: str):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and if_none_match.strip() == "*":
+        # "*" matches whatever is stored under the key
+        return audio_cache.get(key) is not None
+    return etag_matches(if_none_match, f'"{key}"')
+
 @router.post("/tts/")
-async def tts(text: str = Body(...), voice: str = Body("alloy")):
-    return await convert_text_to_audio(text, voice)
\ No newline at end of file
+async def tts(request: Request, text: str = Body(...), voice: str = Body("alloy")):
+    key = audio_cache.make_key(text, voice, TTS_MODEL)
+    if not_modified(request, key):
+        return Response(status_code=304, headers={"ETag": f'"{key}"'})
+    return await convert_text_to_audio(text, voice)
+
+@router.get("/tts/{key}")
+async def tts_replay(key: str, request: Request):
+    """
+    Replay cached audio by its key (the ETag of the POST response), with Range support.
+    Keys handed out by speculative synthesis wait for the synthesis if it is still running, on
+    any worker.
+    """
+    if not re.fullmatch(r"[0-9a-f]{64}", key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    if not_modified(request, key):
+        return Response(status_code=304, headers={"ETag": f'"{key}"'})
+    response = await replay_speech(key)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return response
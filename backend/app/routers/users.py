@@ -1,85 +1,149 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from sqlalchemy.exc import IntegrityError
 
 from .. import schemas
 from ..database import get_db
-from ..models import User
+from ..models import Meeting, User, user_meeting
+from ..projections import MEETING_COLUMNS, USER_COLUMNS, meeting_dict, user_dict
+from ..util.responses import JSONResponse
+from ..util.entity_cache import entity_cache, meeting_key, members_key, user_key, user_meetings_key
 
 router = APIRouter()
 
 # User CRUD operations
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+# Relationships are never lazy-loaded on an AsyncSession: pass the loader options a caller needs.
+async def get_user(db: AsyncSession, user_id: int, options: tuple = ()):
+    result = await db.execute(select(User).filter(User.id == user_id).options(*options))
+    return result.scalars().first()
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+async def get_user_dict(db: AsyncSession, user_id: int):
+    """
+    Return a user in the schemas.User shape, from the entity cache if possible; None if it does not exist.
+    """
+    user = await entity_cache.get(user_key(user_id))
+    if user is not None:
+        return user
+    generation = await entity_cache.generation()
+    result = await db.execute(select(*USER_COLUMNS).filter(User.id == user_id))
+    row = result.first()
+    if row is None:
+        return None
+    user = user_dict(row)
+    await entity_cache.set_many({user_key(user_id): user}, generation)
+    return user
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(User).filter(User.username == username))
+    return result.scalars().first()
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def get_user_with_meetings(db: AsyncSession, user_id: int):
+    """
+    Project a user and their meetings to the schemas.UserSchema shape; None if the user does not exist.
+    Served from the entity cache when the user, their meeting ids and those meetings are all cached,
+    otherwise read in one query that fills the cache.
+    """
+    cached = await entity_cache.get_many([user_key(user_id), user_meetings_key(user_id)])
+    user, meeting_ids = cached.get(user_key(user_id)), cached.get(user_meetings_key(user_id))
+    if user is not None and meeting_ids is not None:
+        meetings = await entity_cache.get_many([meeting_key(meeting_id) for meeting_id in meeting_ids])
+        if len(meetings) == len(meeting_ids):
+            return {**user, "meetings": [meetings[meeting_key(meeting_id)] for meeting_id in meeting_ids]}
+
+    generation = await entity_cache.generation()
+    result = await db.execute(
+        select(*USER_COLUMNS, *MEETING_COLUMNS)
+        .select_from(User)
+        .outerjoin(user_meeting, user_meeting.c.user_id == User.id)
+        .outerjoin(Meeting, Meeting.id == user_meeting.c.meeting_id)
+        .filter(User.id == user_id)
+        .order_by(Meeting.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    user = user_dict(rows[0])
+    meetings = [meeting_dict(row) for row in rows if row.meeting_id is not None]
+    await entity_cache.set_many({
+        user_key(user_id): user,
+        user_meetings_key(user_id): [meeting["id"] for meeting in meetings],
+        **{meeting_key(meeting["id"]): meeting for meeting in meetings}
+    }, generation)
+    return {**user, "meetings": meetings}
+
+async def get_user_meeting_ids(db: AsyncSession, user_id: int) -> List[int]:
+    result = await db.execute(select(user_meeting.c.meeting_id).filter(user_meeting.c.user_id == user_id))
+    return result.scalars().all()
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(User).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
     db_user = User(**user.dict())
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update_user(db: Session, user_id: int, user: schemas.UserCreate):
-    db_user = get_user(db, user_id)
+async def update_user(db: AsyncSession, user_id: int, user: schemas.UserCreate):
+    db_user = await get_user(db, user_id)
     if db_user:
         for key, value in user.dict().items():
             setattr(db_user, key, value)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await entity_cache.invalidate([user_key(user_id)])
+        await db.refresh(db_user)
     return db_user
 
-def delete_user(db: Session, user_id: int):
-    db_user = get_user(db, user_id)
+async def delete_user(db: AsyncSession, user_id: int):
+    db_user = await get_user(db, user_id)
     if db_user:
-        db.delete(db_user)
-        db.commit()
+        meeting_ids = await get_user_meeting_ids(db, user_id)
+        await db.delete(db_user)
+        await db.commit()
+        await entity_cache.invalidate([user_key(user_id), user_meetings_key(user_id), *(members_key(meeting_id) for meeting_id in meeting_ids)])
     return db_user
 
 # User CRUD endpoints
 @router.post("/users/", response_model=schemas.User)
-def create_user_route(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_username(db, username=user.username)
+async def create_user_route(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user_by_username(db, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    return create_user(db=db, user=user)
+    return await create_user(db=db, user=user)
 
 @router.get("/users/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = get_users(db, skip=skip, limit=limit)
+async def read_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    users = await get_users(db, skip=skip, limit=limit)
     return users
 
 @router.get("/users/{user_id}", response_model=schemas.UserSchema)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = get_user(db, user_id=user_id)
-    if db_user is None:
+async def read_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await get_user_with_meetings(db, user_id=user_id)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user
+    return JSONResponse(user)
 
 @router.put("/users/{user_id}", response_model=schemas.User)
-def update_user_route(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = update_user(db, user_id=user_id, user=user)
+async def update_user_route(user_id: int, user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await update_user(db, user_id=user_id, user=user)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 @router.delete("/users/{user_id}", response_model=schemas.User)
-def delete_user_route(user_id: int, db: Session = Depends(get_db)):
-    db_user = delete_user(db, user_id=user_id)
+async def delete_user_route(user_id: int, db: AsyncSession = Depends(get_db)):
+    db_user = await delete_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 @router.get("/users/{user_id}/meetings", response_model=List[schemas.Meeting])
-def read_user_meetings(user_id: int, db: Session = Depends(get_db)):
-    db_user = get_user(db, user_id=user_id)
-    if db_user is None:
+async def read_user_meetings(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await get_user_with_meetings(db, user_id=user_id)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return db_user.meetings
-
+    return JSONResponse(user["meetings"])
@@ -1,5 +1,5 @@
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 from typing import List, Optional
 
@@ -39,7 +39,9 @@ class MeetingSchema(Meeting):
     users: List[User] = []
 
 class ChatMessage(BaseModel):
-    message: str
+    id: Optional[int] = None
+    # Read from the pre-rendered display text when serializing stored messages
+    message: str = Field(validation_alias=AliasChoices("display_message", "message"))
     author: str
     timestamp: datetime
 
@@ -47,6 +49,11 @@ class MeetingAgenda(BaseModel):
     agenda_item: str
     completed: bool
 
+class AudioHandle(BaseModel):
+    text: str
+    key: str
+    url: str
+
 class Conversation(BaseModel):
     user_id: int
     meeting_id: int
@@ -54,6 +61,13 @@ class Conversation(BaseModel):
     meeting_agenda: list[MeetingAgenda] = []
     system_prompt: str = "EMPTY"
     finished: bool = False
+    audio: list[AudioHandle] = []
+
+class ConversationDelta(BaseModel):
+    chat_messages: list[ChatMessage] = []
+    meeting_agenda: list[MeetingAgenda] = []
+    finished: bool = False
+    audio: list[AudioHandle] = []
 
 class ConversationStatus(str, Enum):
     TODO = "todo"
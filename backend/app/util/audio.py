@@ -0,0 +1,236 @@
+"""
+Audio ingest and chunking for transcription.
+
+Uploads are spooled to a temporary file in fixed-size chunks while the size limit is enforced;
+multipart bodies are parsed as they arrive, so an oversized upload is rejected without being
+buffered first.
+Recordings larger than Whisper accepts or longer than AUDIO_CHUNK_SECONDS are split at silences
+with ffmpeg so the pieces can be transcribed in parallel. Splitting needs the ffmpeg and ffprobe
+binaries; without them only recordings Whisper accepts as a whole can be transcribed.
+"""
+from typing import AsyncIterator, Iterable, List, NamedTuple, Optional, Tuple
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:
+    # python-multipart before 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+MAX_AUDIO_SIZE = int(os.getenv("MAX_AUDIO_SIZE", str(200 * 1024 * 1024)))
+AUDIO_CHUNK_SECONDS = float(os.getenv("AUDIO_CHUNK_SECONDS", "600"))
+
+_silence_start = re.compile(r"silence_start: (-?[\d.]+)")
+_silence_end = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+class AudioTooLarge(Exception):
+    pass
+
+
+class InvalidUpload(Exception):
+    pass
+
+
+class SpooledUpload(NamedTuple):
+    path: str
+    filename: str
+    content_type: str
+
+
+async def spool_to_tempfile(chunks: AsyncIterator[bytes], max_size: int, suffix: str = "") -> str:
+    """
+    Write chunks to a temporary file and return its path. Raises AudioTooLarge as soon as
+    more than max_size bytes have been received.
+    """
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise AudioTooLarge(f"Audio exceeds the limit of {max_size} bytes")
+            temp_file.write(chunk)
+    except BaseException:
+        temp_file.close()
+        os.unlink(temp_file.name)
+        raise
+    temp_file.close()
+    return temp_file.name
+
+
+def _feed(method, *args):
+    try:
+        method(*args)
+    except ValueError as e:
+        # python-multipart's parse errors are ValueErrors
+        raise InvalidUpload(f"Malformed multipart body: {e}.") from e
+
+
+async def spool_multipart_file(chunks: AsyncIterator[bytes], content_type: str, field: str, max_size: int,
+                               allowed_types: Iterable[str]) -> SpooledUpload:
+    """
+    Parse a multipart/form-data body as it arrives and write the file of field to a temporary
+    file; other parts are skipped. Raises InvalidUpload if the body is not multipart, the field is
+    missing or its content type is not allowed (checked before its data is read), and
+    AudioTooLarge as soon as the file exceeds max_size bytes.
+    """
+    media_type, options = parse_options_header(content_type)
+    if media_type != b"multipart/form-data" or b"boundary" not in options:
+        raise InvalidUpload("Expected a multipart/form-data body.")
+
+    # The parser's callbacks only collect; writing and validation happen between chunks
+    part = {}
+    header_field, header_value = bytearray(), bytearray()
+    events = []
+
+    def on_part_begin():
+        part.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        part[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part.get(b"content-disposition", b""))
+        events.append(("headers", disposition, part.get(b"content-type", b"").decode("latin-1")))
+
+    def on_part_data(data: bytes, start: int, end: int):
+        events.append(("data", data[start:end]))
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    upload = None
+    temp_file = None
+    writing = False
+    size = 0
+    try:
+        async for chunk in chunks:
+            _feed(parser.write, chunk)
+            for event in events:
+                if event[0] == "headers":
+                    _, disposition, part_type = event
+                    writing = upload is None and disposition.get(b"name", b"").decode("latin-1") == field
+                    if not writing:
+                        continue
+                    if part_type.split(";")[0].strip() not in allowed_types:
+                        raise InvalidUpload("Invalid file type. Only audio files are allowed.")
+                    filename = disposition.get(b"filename", b"").decode("utf-8", errors="replace")
+                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1])
+                    upload = SpooledUpload(temp_file.name, filename, part_type)
+                elif writing:
+                    size += len(event[1])
+                    if size > max_size:
+                        raise AudioTooLarge(f"Audio exceeds the limit of {max_size} bytes")
+                    temp_file.write(event[1])
+            events.clear()
+        _feed(parser.finalize)
+    except BaseException:
+        if temp_file is not None:
+            temp_file.close()
+            os.unlink(temp_file.name)
+        raise
+    if upload is None:
+        raise InvalidUpload(f"The {field} field is missing.")
+    temp_file.close()
+    return upload
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+async def _run(*args: str) -> Tuple[int, str, str]:
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+async def probe_duration(path: str) -> Optional[float]:
+    returncode, stdout, _ = await _run(
+        "ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path
+    )
+    try:
+        return float(stdout.strip()) if returncode == 0 else None
+    except ValueError:
+        return None
+
+
+async def detect_silences(path: str, noise_db: int = -30, min_silence: float = 0.5) -> List[Tuple[float, float]]:
+    """
+    Return (start, end) of the silent stretches in a recording, in seconds.
+    """
+    _, _, stderr = await _run(
+        "ffmpeg", "-hide_banner", "-nostats", "-i", path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"
+    )
+    starts = [float(value) for value in _silence_start.findall(stderr)]
+    ends = [float(value) for value in _silence_end.findall(stderr)]
+    return list(zip(starts, ends))
+
+
+def choose_split_points(duration: float, silences: List[Tuple[float, float]], target: float) -> List[float]:
+    """
+    Pick cut points so no chunk is longer than target seconds, preferring the middle of the
+    latest silence in the second half of each chunk and cutting hard where there is none.
+    """
+    points = []
+    last = 0.0
+    while duration - last > target:
+        limit = last + target
+        candidates = [(start + end) / 2 for start, end in silences if last + target / 2 < (start + end) / 2 <= limit]
+        cut = candidates[-1] if candidates else limit
+        points.append(cut)
+        last = cut
+    return points
+
+
+async def _export_chunk(path: str, start: float, end: float) -> str:
+    chunk_path = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3").name
+    # Mono 16 kHz 64 kbit/s keeps a 10 minute chunk around 5 MB, well below Whisper's limit
+    returncode, _, stderr = await _run(
+        "ffmpeg", "-y", "-v", "error", "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+        "-vn", "-ac", "1", "-ar", "16000", "-c:a", "libmp3lame", "-b:a", "64k", chunk_path
+    )
+    if returncode != 0:
+        os.unlink(chunk_path)
+        raise RuntimeError(f"ffmpeg failed to export audio chunk: {stderr.strip()}")
+    return chunk_path
+
+
+async def split_audio(path: str, duration: float, target: float = AUDIO_CHUNK_SECONDS) -> List[str]:
+    """
+    Split a recording at silences into chunks of at most target seconds. Returns the chunk
+    paths in order; the caller removes them.
+    """
+    points = choose_split_points(duration, await detect_silences(path), target)
+    bounds = list(zip([0.0] + points, points + [duration]))
+    results = await asyncio.gather(*[_export_chunk(path, start, end) for start, end in bounds], return_exceptions=True)
+    chunk_paths = [result for result in results if isinstance(result, str)]
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        for chunk_path in chunk_paths:
+            os.unlink(chunk_path)
+        raise errors[0]
+    return chunk_paths
@@ -0,0 +1,116 @@
+"""
+Content-addressed on-disk cache for synthesized speech.
+
+Files are stored as <directory>/<key[:2]>/<key>.mp3 where the key hashes (model, voice, text).
+The total size is capped at TTS_CACHE_MAX_BYTES; the least recently used files are evicted first.
+"""
+from contextlib import contextmanager
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class AudioCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> [size, last access]; built once at startup so lookups do not scan the directory
+        self._index: Dict[str, list] = {}
+        os.makedirs(directory, exist_ok=True)
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".mp3"):
+                    stat = os.stat(os.path.join(root, name))
+                    self._index[name[:-4]] = [stat.st_size, stat.st_mtime]
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str) -> str:
+        return hashlib.sha256(json.dumps([model, voice, text]).encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    @property
+    def size(self) -> int:
+        return sum(size for size, _ in self._index.values())
+
+    def contains(self, key: str) -> bool:
+        return key in self._index or os.path.exists(self.path(key))
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the path of a cached file, or None on a miss.
+        """
+        path = self.path(key)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None and os.path.exists(path):
+                # Written by another worker
+                entry = self._index[key] = [os.path.getsize(path), time.time()]
+            if entry is None or not os.path.exists(path):
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+            entry[1] = time.time()
+            self.hits += 1
+        return path
+
+    @contextmanager
+    def writer(self, key: str):
+        """
+        Open a file to write an entry. It only becomes visible once the block completes;
+        if the block raises (or the response is cancelled) the partial file is discarded.
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_file = tempfile.NamedTemporaryFile(delete=False, dir=os.path.dirname(path), suffix=".part")
+        try:
+            yield temp_file
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+        temp_file.close()
+        os.replace(temp_file.name, path)
+        with self._lock:
+            self._index[key] = [os.path.getsize(path), time.time()]
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            total = self.size
+            for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(self.path(key))
+                except FileNotFoundError:
+                    pass
+                del self._index[key]
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._index),
+            "bytes": self.size
+        }
+
+
+audio_cache = AudioCache(
+    os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tts-cache")),
+    int(os.getenv("TTS_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+)
@@ -0,0 +1,130 @@
+"""
+Response compression for API responses.
+
+CompressionMiddleware compresses text and JSON responses with brotli when the client accepts it
+and the optional brotli package is installed, and with gzip otherwise. Small responses and
+already compressed content (audio, images) are sent as they are. Streamed responses (NDJSON)
+are flushed chunk by chunk, so tokens still reach the client as they are generated.
+"""
+from typing import Optional
+import re
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    # brotli is optional; gzip is used for every client
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(r"^(text/|application/(json|x-ndjson|javascript|xml)|application/[\w.+-]+\+(json|xml)|image/svg\+xml)")
+
+
+def accepted_encodings(header: str) -> set:
+    """
+    Encodings an Accept-Encoding header allows (q > 0), lowercased.
+    """
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    encodings = accepted_encodings(header)
+    if brotli is not None and ("br" in encodings or "*" in encodings):
+        return "br"
+    if "gzip" in encodings or "*" in encodings:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies of at least minimum_size bytes; streamed
+    responses are always compressed since their size is not known up front.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                # Trailers after a compressed body, or e.g. http.response.pathsend which we leave alone
+                if compressor is None:
+                    passthrough = True
+                    await send(start)
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                if (
+                    start["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not COMPRESSIBLE_TYPES.match(headers.get("content-type", ""))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                body = compressor.compress(body, final=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+            else:
+                body = compressor.compress(body, final=not more_body)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,102 @@
+"""
+Read-through cache for meetings, users and meeting membership.
+
+The routers look rows up here before querying and invalidate the affected keys after every
+write that changes them. Values are the projection dicts of app/projections.py; membership is
+cached as id lists in both directions, so renaming a user only invalidates that user.
+
+Only existing rows are cached. Entries are kept in a TTLStore (see ttl_store.py) selected with
+ENTITY_CACHE:
+- "memory" (default): per process; other workers see a write once their entry expires
+  (ENTITY_CACHE_TTL, 60 s by default).
+- "sqlite": a file shared by all workers on the host (ENTITY_CACHE_PATH), so invalidations are
+  seen everywhere at once. Values are stored as JSON, so datetimes come back as ISO strings.
+  Lookups run on a worker thread.
+- "off": every lookup is a miss.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import os
+
+from .ttl_store import TTLStore, create_store
+
+
+def meeting_key(meeting_id: int) -> str:
+    return f"meeting:{meeting_id}"
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def members_key(meeting_id: int) -> str:
+    """Ids of the users of a meeting."""
+    return f"members:{meeting_id}"
+
+def user_meetings_key(user_id: int) -> str:
+    """Ids of the meetings of a user."""
+    return f"user_meetings:{user_id}"
+
+
+class EntityCache:
+    def __init__(self, store: TTLStore):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def _run(self, func, *args):
+        if self.store.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Return the cached values of keys; missing and expired keys are left out.
+        """
+        values = await self._run(self.store.get_many, keys)
+        self.hits += len(values)
+        self.misses += len(keys) - len(values)
+        return values
+
+    async def generation(self) -> int:
+        """
+        Read before querying the values to cache, and pass to set_many.
+        """
+        return await self._run(self.store.generation)
+
+    async def set_many(self, items: Dict[str, Any], generation: Optional[int] = None):
+        """
+        Store values. Pass the generation read before querying them: if a write invalidated
+        anything since, in any worker sharing the store, they may be stale and are not stored.
+        """
+        await self._run(self.store.set_many, items, generation)
+
+    async def invalidate(self, keys: Iterable[str]):
+        keys = list(keys)
+        self.invalidations += len(keys)
+        await self._run(self.store.invalidate, keys)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.store.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def create_entity_cache() -> EntityCache:
+    return EntityCache(create_store(
+        os.getenv("ENTITY_CACHE", "memory"),
+        path=os.getenv("ENTITY_CACHE_PATH", "./entity_cache.db"),
+        table="entity_cache",
+        ttl=float(os.getenv("ENTITY_CACHE_TTL", "60")),
+        max_entries=int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "10000"))
+    ))
+
+
+entity_cache = create_entity_cache()
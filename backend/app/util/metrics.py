@@ -0,0 +1,229 @@
+"""
+In-process metrics with a Prometheus text exposition, served at /api/metrics.
+
+- MetricsMiddleware records per-route request counts and latency, and the number and duration
+  of the DB queries each request ran.
+- instrument_engine hooks an SQLAlchemy engine so its queries are counted.
+- The scheduler records OpenAI call latency and token usage per model.
+- register_stats exposes the stats() of caches, pools and the scheduler as gauges at scrape time.
+
+Metrics are per process; with several uvicorn workers each worker is scraped on its own.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [count per bucket..., count above the last bucket, sum, count]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 3)
+            state[bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-2]):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(float(state[-2]))}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._stats: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, stats: Callable[[], Dict[str, float]]):
+        """
+        Export the numeric values of stats() as gauges named <prefix>_<key>, read at scrape time.
+        """
+        self._stats[prefix] = stats
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, stats in self._stats.items():
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = registry.histogram("http_request_duration_seconds", "HTTP request latency until the response is complete", ("method", "route"))
+db_queries = registry.counter("db_queries_total", "SQL statements executed")
+db_query_latency = registry.histogram("db_query_duration_seconds", "Duration of single SQL statements")
+db_queries_per_request = registry.histogram("db_queries_per_request", "SQL statements per HTTP request", ("route",), QUERY_COUNT_BUCKETS)
+db_time_per_request = registry.histogram("db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ("route",))
+openai_latency = registry.histogram("openai_request_duration_seconds", "OpenAI API call latency (time to response headers for streams)", ("model", "outcome"))
+openai_tokens = registry.counter("openai_tokens_total", "OpenAI tokens used", ("model", "type"))
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request; None outside requests (workers, startup)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(engine):
+    """
+    Count and time the statements of engine (for an AsyncEngine, pass engine.sync_engine).
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_queries.inc()
+        db_query_latency.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "path", "") or getattr(route, "name", "") or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request until its last body chunk, so streamed
+    responses are measured in full, and counting the DB queries it ran.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = [500]
+        recorded = [False]
+
+        def record():
+            if recorded[0]:
+                return
+            recorded[0] = True
+            route = route_label(scope)
+            http_requests.inc(method=scope["method"], route=route, status=status[0])
+            http_latency.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            db_queries_per_request.observe(stats.queries, route=route)
+            db_time_per_request.observe(stats.query_seconds, route=route)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            record()
+            raise
+        finally:
+            current_request.reset(token)
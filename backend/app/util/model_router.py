@@ -0,0 +1,147 @@
+"""
+Model-tier routing for chat turns.
+
+Each turn is sent to the fast tier (a cheaper, quicker model) or the strong tier, picked by
+rules on the user's latest message: the opening message, agenda changes, long messages and
+messages that look like the user wrapping up (the final #EOC# turn) go to the strong tier,
+short clarifying answers to the fast tier. A call that fails or exceeds its tier's timeout is
+retried once on the other tier. Latency, fallbacks and cost are recorded per tier.
+
+MODEL_ROUTING selects the mode: "rules" (default), or "strong" / "fast" to pin every turn to
+one tier.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import re
+import time
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+tier_requests = registry.counter("chat_tier_requests_total", "Chat turns routed to a model tier", ("tier", "reason"))
+tier_latency = registry.histogram("chat_tier_duration_seconds", "Chat call latency per model tier, including scheduler waits and retries", ("tier", "model", "outcome"))
+tier_fallbacks = registry.counter("chat_tier_fallbacks_total", "Chat calls retried on the other tier", ("tier", "error"))
+tier_cost = registry.counter("chat_tier_cost_usd_total", "Estimated cost of chat calls in USD", ("tier", "model"))
+
+DEFAULT_FINAL_PATTERN = (
+    r"\b(that'?s (all|it|everything)|looks? (good|great|fine)|sounds good|perfect|i'?m (done|happy)|"
+    r"happy with|nothing (else|more)|no more|we'?re (done|good)|finali[sz]e|bye)\b"
+)
+DEFAULT_AGENDA_PATTERN = r"\b(agenda|add|remove|drop|replace|rename|reorder|prioriti[sz]e|merge|split)\b|^\s*(\d+[.)]|[-*])\s"
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse "model=input:output,..." (USD per million tokens) into {model: (input, output)}.
+    """
+    prices = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, values = entry.partition("=")
+        input_price, _, output_price = values.partition(":")
+        prices[model.strip()] = (float(input_price or 0), float(output_price or input_price or 0))
+    return prices
+
+
+class ModelTier:
+    def __init__(self, name: str, model: str, max_tokens: int, timeout: float):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+
+class ModelRouter:
+    def __init__(self, fast: ModelTier, strong: ModelTier, mode: str, short_words: int,
+                 final_pattern: str, agenda_pattern: str, prices: Dict[str, Tuple[float, float]]):
+        if mode not in ("rules", "fast", "strong"):
+            raise ValueError(f"Unknown MODEL_ROUTING {mode!r}")
+        self.fast = fast
+        self.strong = strong
+        self.mode = mode
+        self.short_words = short_words
+        self.final_pattern = re.compile(final_pattern, re.IGNORECASE | re.MULTILINE)
+        self.agenda_pattern = re.compile(agenda_pattern, re.IGNORECASE | re.MULTILINE)
+        self.prices = prices
+
+    def choose(self, messages: List[str]) -> Tuple[ModelTier, str]:
+        """
+        Pick the tier for a turn. messages alternate assistant/user starting with the assistant,
+        so the history ends with the user's new message when its length is even and non-zero.
+        """
+        if self.mode == "fast":
+            return self.fast, "pinned"
+        if self.mode == "strong":
+            return self.strong, "pinned"
+        if not messages or len(messages) % 2 == 1:
+            return self.strong, "opening"
+        user_message = messages[-1]
+        if self.final_pattern.search(user_message):
+            return self.strong, "final"
+        if self.agenda_pattern.search(user_message):
+            return self.strong, "agenda"
+        if len(user_message.split()) > self.short_words:
+            return self.strong, "long"
+        return self.fast, "clarification"
+
+    def other(self, tier: ModelTier) -> ModelTier:
+        return self.strong if tier is self.fast else self.fast
+
+    def record_usage(self, tier: ModelTier, usage):
+        """
+        Add the cost of a call's usage (prompt/completion tokens) to the tier's cost counter.
+        """
+        if usage is None or tier.model not in self.prices:
+            return
+        input_price, output_price = self.prices[tier.model]
+        cost = ((getattr(usage, "prompt_tokens", None) or 0) * input_price
+                + (getattr(usage, "completion_tokens", None) or 0) * output_price) / 1_000_000
+        tier_cost.inc(cost, tier=tier.name, model=tier.model)
+
+    async def call(self, messages: List[str], func: Callable[[ModelTier], Awaitable], tier: Optional[ModelTier] = None):
+        """
+        Run func(tier) (one scheduled API call) on the tier chosen for messages, or on tier if
+        given, falling back to the other tier once. Returns the response and the tier that produced it.
+        """
+        if tier is None:
+            tier, reason = self.choose(messages)
+            tier_requests.inc(tier=tier.name, reason=reason)
+        attempts = [tier] if self.fast.model == self.strong.model else [tier, self.other(tier)]
+        for attempt, current in enumerate(attempts):
+            started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(func(current), current.timeout)
+            except Exception as e:
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+                tier_latency.observe(time.monotonic() - started, tier=current.name, model=current.model, outcome=outcome)
+                if attempt == len(attempts) - 1:
+                    raise
+                tier_fallbacks.inc(tier=current.name, error=outcome)
+                logger.warning(f"Chat call on the {current.name} tier ({current.model}) failed ({outcome}), falling back")
+                continue
+            tier_latency.observe(time.monotonic() - started, tier=current.name, model=current.model, outcome="ok")
+            self.record_usage(current, getattr(response, "usage", None))
+            return response, current
+
+
+model_router = ModelRouter(
+    fast=ModelTier(
+        "fast",
+        os.getenv("CHAT_MODEL_FAST", "gpt-4o-mini"),
+        max_tokens=int(os.getenv("CHAT_MAX_TOKENS_FAST", "150")),
+        timeout=float(os.getenv("CHAT_TIMEOUT_FAST", "20"))
+    ),
+    strong=ModelTier(
+        "strong",
+        os.getenv("CHAT_MODEL_STRONG", "gpt-4o"),
+        max_tokens=int(os.getenv("CHAT_MAX_TOKENS_STRONG", "150")),
+        timeout=float(os.getenv("CHAT_TIMEOUT_STRONG", "60"))
+    ),
+    mode=os.getenv("MODEL_ROUTING", "rules"),
+    short_words=int(os.getenv("MODEL_ROUTING_SHORT_WORDS", "25")),
+    final_pattern=os.getenv("MODEL_ROUTING_FINAL_PATTERN", DEFAULT_FINAL_PATTERN),
+    agenda_pattern=os.getenv("MODEL_ROUTING_AGENDA_PATTERN", DEFAULT_AGENDA_PATTERN),
+    prices=parse_prices(os.getenv("MODEL_PRICES", "gpt-4o=2.5:10,gpt-4o-mini=0.15:0.6"))
+)
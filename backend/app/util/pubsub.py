@@ -0,0 +1,107 @@
+"""
+Publish/subscribe for pushing conversation and meeting updates to WebSocket clients.
+
+PubSub is the interface the routers use; InMemoryPubSub delivers within one process. With
+several uvicorn workers, a client only sees updates made by its own worker; a broker-backed
+subclass (e.g. Redis pub/sub) implementing publish and subscribe can be swapped in through
+create_pubsub without touching the routers. Messages must be JSON-compatible dicts.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionOverflow(Exception):
+    """
+    The subscriber fell too far behind and missed messages; it should resynchronize.
+    """
+
+
+class Subscription:
+    def __init__(self, channel: str, queue_size: int):
+        self.channel = channel
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def deliver(self, message: dict):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Do not block publishers on a slow client; tell it to resync instead
+            self.overflowed = True
+            logger.warning(f"Subscriber of {self.channel} overflowed, dropping it")
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> dict:
+        message = await self._queue.get()
+        if message is None:
+            raise SubscriptionOverflow(self.channel)
+        return message
+
+
+class PubSub:
+    async def publish(self, channel: str, message: dict):
+        raise NotImplementedError
+
+    def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        """
+        Async context manager yielding a Subscription that receives the channel's messages
+        published while it is open.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, float]:
+        return {}
+
+
+class InMemoryPubSub(PubSub):
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    async def publish(self, channel: str, message: dict):
+        self.published += 1
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.deliver(message)
+            self.delivered += 1
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        subscription = Subscription(channel, self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered
+        }
+
+
+def create_pubsub() -> PubSub:
+    backend = os.getenv("PUBSUB_BACKEND", "memory")
+    if backend == "memory":
+        return InMemoryPubSub(int(os.getenv("PUBSUB_QUEUE_SIZE", "100")))
+    raise ValueError(f"Unknown PUBSUB_BACKEND {backend!r}")
+
+
+pubsub = create_pubsub()
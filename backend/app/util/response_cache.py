@@ -0,0 +1,85 @@
+"""
+Response cache for LLM completions.
+
+Entries are keyed by a hash of the model and the normalized prompt, expire after a TTL and are
+evicted least-recently-used once the cache is full (see ttl_store.py). The backend is selected
+with RESPONSE_CACHE ("sqlite", "memory" or "off"). Use aget/aset from async code: with the
+SQLite backend they run on a worker thread so they do not block the event loop.
+"""
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+from .ttl_store import TTLStore, create_store
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    return _whitespace.sub(" ", text).strip()
+
+
+def make_key(model: str, system_message: str, messages: List[str]) -> str:
+    payload = json.dumps([model, normalize_prompt(system_message), [normalize_prompt(msg) for msg in messages]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Counts hits and misses on top of a TTLStore.
+    """
+
+    def __init__(self, store: TTLStore):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        value = self.store.get_many([key]).get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict):
+        self.store.set_many({key: value})
+
+    def clear(self):
+        self.store.clear()
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        if self.store.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Dict):
+        if self.store.blocking:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.store.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def create_response_cache() -> ResponseCache:
+    return ResponseCache(create_store(
+        os.getenv("RESPONSE_CACHE", "sqlite"),
+        path=os.getenv("RESPONSE_CACHE_PATH", "./response_cache.db"),
+        table="response_cache",
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 60 * 60))),
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    ))
+
+
+response_cache = create_response_cache()
@@ -0,0 +1,51 @@
+"""
+JSON response rendering with orjson when it is installed, and conditional GET helpers.
+
+orjson serializes datetimes, enums and dicts natively and several times faster than the
+standard library, which matters for the list and conversation endpoints.
+
+Polled endpoints send a weak ETag with Cache-Control: no-cache, so browsers revalidate with
+If-None-Match and get a 304 without a body when nothing changed. The ETag is computed from a
+version (or the rows the response is built from) before the response is rendered.
+"""
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse as StdJSONResponse, Response
+from typing import Any, Optional
+import hashlib
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; fall back to the standard library encoder
+    orjson = None
+
+
+class JSONResponse(StdJSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(jsonable_encoder(content))
+
+
+def make_etag(*parts) -> str:
+    """
+    Weak ETag of the values a response is built from; weak because compression changes the bytes.
+    """
+    return 'W/"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_json(content: Any, etag: str) -> JSONResponse:
+    return JSONResponse(content, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
@@ -0,0 +1,261 @@
+"""
+Central scheduler for OpenAI API calls.
+
+Every call goes through OpenAIScheduler.call, which
+- limits the number of calls in flight,
+- enforces per-model requests/tokens per minute with token buckets,
+- serves interactive calls before background work,
+- retries rate limits, timeouts and server errors with jittered backoff, honoring Retry-After.
+"""
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import itertools
+import logging
+import os
+import random
+import time
+
+import openai
+
+from .metrics import openai_latency, openai_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most one minute of budget.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until amount can be consumed, 0 if it can be consumed now.
+        """
+        self._refill()
+        # Requests larger than the bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """
+    Parse "model=rpm[:tpm],..." into {model: (rpm, tpm)}.
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, values = entry.partition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = (float(rpm) if rpm else None, float(tpm) if tpm else None)
+    return limits
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the server's requested delay from a failed call, if any.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class OpenAIScheduler:
+    def __init__(self, limits: Dict[str, Tuple[Optional[float], Optional[float]]], max_concurrency: int,
+                 max_retries: int, base_delay: float, max_delay: float):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._request_buckets = {model: TokenBucket(rpm) for model, (rpm, _) in limits.items() if rpm}
+        self._token_buckets = {model: TokenBucket(tpm) for model, (_, tpm) in limits.items() if tpm}
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.in_flight = 0
+        self.counters = {"requests": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+        self.wait_seconds = 0.0
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        return sum(1 for waiter in self._waiters if not waiter[4].done() and (priority is None or waiter[0] == priority))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self.counters,
+            "in_flight": self.in_flight,
+            "queue_depth_interactive": self.queue_depth(Priority.INTERACTIVE),
+            "queue_depth_background": self.queue_depth(Priority.BACKGROUND),
+            "wait_seconds_total": self.wait_seconds
+        }
+
+    def _wait_time(self, model: str, tokens: int) -> float:
+        wait = 0.0
+        if model in self._request_buckets:
+            wait = max(wait, self._request_buckets[model].wait_time(1))
+        if model in self._token_buckets and tokens:
+            wait = max(wait, self._token_buckets[model].wait_time(tokens))
+        return wait
+
+    def _consume(self, model: str, tokens: int):
+        if model in self._request_buckets:
+            self._request_buckets[model].consume(1)
+        if model in self._token_buckets and tokens:
+            self._token_buckets[model].consume(tokens)
+
+    def _dispatch(self):
+        """
+        Grant slots in priority, then arrival order. Once a waiter is held back by its model's
+        rate limits, later waiters for that model wait behind it, so background calls cannot use
+        up the budget an interactive call is waiting for.
+        """
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._waiters.sort(key=lambda waiter: waiter[:2])
+        next_wait = None
+        blocked_models = set()
+        for waiter in list(self._waiters):
+            if self.in_flight >= self.max_concurrency:
+                return
+            priority, _, model, tokens, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+                continue
+            if model in blocked_models:
+                continue
+            wait = self._wait_time(model, tokens)
+            if wait > 0:
+                blocked_models.add(model)
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+                continue
+            self._consume(model, tokens)
+            self._waiters.remove(waiter)
+            self.in_flight += 1
+            future.set_result(None)
+        if next_wait is not None:
+            self._wakeup = asyncio.get_running_loop().call_later(next_wait, self._dispatch)
+
+    @asynccontextmanager
+    async def slot(self, model: str, tokens: int = 0, priority: Priority = Priority.INTERACTIVE):
+        """
+        Wait for a concurrency slot and rate limit budget for one call to model.
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._sequence), model, tokens, future)
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before cancellation
+                self.in_flight -= 1
+            elif waiter in self._waiters:
+                # Leave the queue now; waiters for the same model may have been held behind this one
+                self._waiters.remove(waiter)
+            self._dispatch()
+            raise
+        self.wait_seconds += time.monotonic() - started
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def record_usage(self, model: str, estimated_tokens: int, actual_tokens: int):
+        """
+        Correct the token bucket once the real usage of a call is known.
+        """
+        if model in self._token_buckets:
+            self._token_buckets[model].consume(actual_tokens - estimated_tokens)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, requested)
+        return delay
+
+    async def call(self, model: str, func: Callable[[], Awaitable], tokens: int = 0,
+                   priority: Priority = Priority.INTERACTIVE):
+        """
+        Run func (a zero-argument coroutine function making one API call) under the scheduler.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.counters["requests"] += 1
+            started = None
+            try:
+                async with self.slot(model, tokens, priority):
+                    started = time.monotonic()
+                    response = await func()
+                    openai_latency.observe(time.monotonic() - started, model=model, outcome="ok")
+            except RETRYABLE_ERRORS as e:
+                if started is not None:
+                    openai_latency.observe(time.monotonic() - started, model=model, outcome=type(e).__name__)
+                if isinstance(e, openai.RateLimitError):
+                    self.counters["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    self.counters["failures"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                self.counters["retries"] += 1
+                logger.info(f"OpenAI call to {model} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                if started is not None:
+                    openai_latency.observe(time.monotonic() - started, model=model, outcome=type(e).__name__)
+                self.counters["failures"] += 1
+                raise
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.record_usage(model, tokens, usage.total_tokens)
+                openai_tokens.inc(getattr(usage, "prompt_tokens", None) or 0, model=model, type="prompt")
+                openai_tokens.inc(getattr(usage, "completion_tokens", None) or 0, model=model, type="completion")
+            return response
+
+
+scheduler = OpenAIScheduler(
+    limits=parse_rate_limits(os.getenv(
+        "OPENAI_RATE_LIMITS",
+        "gpt-4o=500:30000,gpt-4o-mini=500:200000,whisper-1=50,tts-1=50"
+    )),
+    max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "32")),
+    max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "4")),
+    base_delay=float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.getenv("OPENAI_RETRY_MAX_DELAY", "20"))
+)
@@ -0,0 +1,160 @@
+"""
+Per-key serialization and request de-duplication for endpoints with side effects.
+
+- KeyedLocks runs the holders of one key one at a time, e.g. the turns of a conversation.
+- IdempotencyStore runs a request once per key: concurrent duplicates wait for the first one
+  and share its result, and completed results are kept for retries until their TTL expires.
+
+Both are per process. With several uvicorn workers sharing one database, duplicates that reach
+different workers are not coalesced, and turns of one conversation handled by different workers
+are not serialized. Until a shared backend (e.g. Redis locks and keys) implementing hold and run
+is added to create_conversation_locks and create_idempotency_store, route requests for one
+conversation to the same worker or run a single worker.
+"""
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import os
+import time
+
+
+class IdempotencyConflict(Exception):
+    """
+    The idempotency key was already used for a request with a different payload.
+    """
+
+
+class KeyedLocks:
+    def __init__(self):
+        # key -> [lock, holders and waiters]; entries are dropped once nobody uses them
+        self._locks: Dict[Hashable, list] = {}
+        self.waits = 0
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        if entry[0].locked():
+            self.waits += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def stats(self) -> Dict[str, float]:
+        return {"locked": sum(1 for lock, _ in self._locks.values() if lock.locked()), "waits": self.waits}
+
+
+class IdempotencyStore:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (stored at, fingerprint, result)
+        self._results: OrderedDict = OrderedDict()
+        # key -> (fingerprint, future of the request doing the work)
+        self._in_flight: Dict[Hashable, tuple] = {}
+        self.replays = 0
+        self.coalesced = 0
+        self.executions = 0
+
+    def _stored(self, key: Hashable):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._results[key]
+            return None
+        return entry
+
+    def _store(self, key: Hashable, fingerprint: Optional[str], result: Any):
+        self._results[key] = (time.monotonic(), fingerprint, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def run(self, key: Hashable, fingerprint: Optional[str], func: Callable[[], Awaitable[Any]], remember: bool = True):
+        """
+        Return func()'s result, running it at most once for concurrent calls with the same key.
+
+        With remember, a successful result is also returned to later calls within the TTL.
+        Failures are not kept, so a retry runs again. Raises IdempotencyConflict when the key
+        is reused with a different fingerprint.
+        """
+        while True:
+            stored = self._stored(key)
+            if stored is not None:
+                if stored[1] != fingerprint:
+                    raise IdempotencyConflict(key)
+                self.replays += 1
+                return stored[2]
+
+            flight = self._in_flight.get(key)
+            if flight is None:
+                break
+            if flight[0] != fingerprint:
+                raise IdempotencyConflict(key)
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(flight[1])
+            except asyncio.CancelledError:
+                # The request doing the work was cancelled (client went away): take over, unless
+                # it is this request that is being cancelled
+                if not flight[1].cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        self.executions += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved so an unshared failure is not logged as never retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if remember:
+                self._store(key, fingerprint, result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "stored": len(self._results),
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "replays": self.replays,
+            "coalesced": self.coalesced
+        }
+
+
+def create_conversation_locks() -> KeyedLocks:
+    backend = os.getenv("CONVERSATION_LOCKS_BACKEND", "memory")
+    if backend == "memory":
+        return KeyedLocks()
+    raise ValueError(f"Unknown CONVERSATION_LOCKS_BACKEND {backend!r}")
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    backend = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    if backend == "memory":
+        return IdempotencyStore(
+            ttl=float(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600))),
+            max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+        )
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND {backend!r}")
+
+
+conversation_locks = create_conversation_locks()
+idempotency_store = create_idempotency_store()
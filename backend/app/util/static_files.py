@@ -0,0 +1,179 @@
+"""
+Static serving for the bundled frontend build.
+
+StaticSite indexes the build directory once at startup, so requests are answered from memory
+without touching the filesystem until the file is sent. For every file it knows the
+precompressed variants next to it (main.js.br, main.js.gz) and serves the best one the client
+accepts. Fingerprinted files (CRA names them like main.3f2a1b9c.js) never change under their
+name and are cached by browsers for a year; everything else (index.html, manifest.json) is
+revalidated with its ETag.
+
+Variants are generated at image build time, see precompress() and the Dockerfile:
+
+    python -m app.util.static_files frontend
+"""
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Dict
+import gzip
+import logging
+import os
+import re
+import sys
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+
+from .compression import COMPRESSIBLE_TYPES, accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    # brotli is optional; only gzip variants are generated without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{8,}\.")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+# Preferred first; suffix of the precompressed file
+VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticFile:
+    __slots__ = ("path", "stat", "media_type", "etag", "cache_control", "variants")
+
+    def __init__(self, path: str, stat: os.stat_result, media_type: str, immutable: bool):
+        self.path = path
+        self.stat = stat
+        self.media_type = media_type
+        self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        self.cache_control = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+        # encoding -> (path, stat)
+        self.variants: Dict[str, tuple] = {}
+
+
+class StaticSite:
+    """
+    ASGI app serving the files of directory; "/" serves index.html.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files: Dict[str, StaticFile] = {}
+        self.build_index()
+
+    def build_index(self):
+        files = {}
+        if not os.path.isdir(self.directory):
+            logger.warning(f"Static directory {self.directory} does not exist, serving no files")
+            self.files = files
+            return
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith((".br", ".gz")):
+                    continue
+                path = os.path.join(root, name)
+                url = "/" + os.path.relpath(path, self.directory).replace(os.sep, "/")
+                media_type = guess_type(name)[0] or "application/octet-stream"
+                static_file = StaticFile(path, os.stat(path), media_type, bool(FINGERPRINTED.search(name)))
+                for encoding, suffix in VARIANTS:
+                    if os.path.isfile(path + suffix):
+                        static_file.variants[encoding] = (path + suffix, os.stat(path + suffix))
+                files[url] = static_file
+        if "/index.html" in files:
+            files["/"] = files["/index.html"]
+        self.files = files
+        logger.info(f"Indexed {len(set(map(id, files.values())))} static files in {self.directory}")
+
+    def stats(self) -> Dict[str, float]:
+        # "/" is an alias of index.html
+        unique = {id(static_file): static_file for static_file in self.files.values()}.values()
+        return {
+            "files": len(unique),
+            "precompressed": sum(1 for static_file in unique if static_file.variants)
+        }
+
+    def response(self, path: str, headers: Headers) -> Response:
+        static_file = self.files.get(path)
+        if static_file is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        file_path, stat, encoding = static_file.path, static_file.stat, None
+        if static_file.variants:
+            accepted = accepted_encodings(headers.get("accept-encoding", ""))
+            for candidate, _ in VARIANTS:
+                if candidate in static_file.variants and candidate in accepted:
+                    encoding = candidate
+                    file_path, stat = static_file.variants[candidate]
+                    break
+
+        etag = static_file.etag if encoding is None else f'{static_file.etag[:-1]}-{encoding}"'
+        response_headers = {"ETag": etag, "Cache-Control": static_file.cache_control}
+        if static_file.variants:
+            response_headers["Vary"] = "Accept-Encoding"
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        response_headers["Last-Modified"] = formatdate(static_file.stat.st_mtime, usegmt=True)
+        return FileResponse(file_path, headers=response_headers, media_type=static_file.media_type, stat_result=stat)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            # A websocket path no router matched
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            response = self.response(self.route_path(scope), Headers(scope=scope))
+        await response(scope, receive, send)
+
+    @staticmethod
+    def route_path(scope) -> str:
+        # Mounted at "/", so the path below the app's root_path
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return path or "/"
+
+
+def precompress(directory: str, minimum_size: int = 1024) -> int:
+    """
+    Write .gz (and with brotli installed .br) variants of the compressible files in directory,
+    skipping variants that are up to date or would not be smaller. Returns the number written.
+    """
+    written = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith((".br", ".gz")):
+                continue
+            path = os.path.join(root, name)
+            if not COMPRESSIBLE_TYPES.match(guess_type(name)[0] or "") or os.path.getsize(path) < minimum_size:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            for encoding, suffix in VARIANTS:
+                if encoding == "br" and brotli is None:
+                    continue
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                compressed = brotli.compress(data, quality=11) if encoding == "br" else gzip.compress(data, 9, mtime=0)
+                if len(compressed) >= len(data):
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    target_directory = sys.argv[1] if len(sys.argv) > 1 else "frontend"
+    print(f"Wrote {precompress(target_directory)} precompressed files in {target_directory}")
@@ -0,0 +1,214 @@
+"""
+Key-value stores with a TTL and least-recently-used eviction, shared by the response cache and
+the entity cache.
+
+- MemoryStore: per process.
+- SQLiteStore: a table in a SQLite file, shared by the workers of a host. Values are stored as
+  JSON, so datetimes come back as ISO strings. Its calls block (blocking = True), so callers on
+  the event loop run them in a thread.
+- TTLStore itself stores nothing, for caches that are turned off.
+
+Every store keeps a generation counter that invalidate() bumps. set_many() can be given the
+generation read before the values were queried and then skips the write if anything was
+invalidated since, so a slow reader cannot put back a value a writer just invalidated. The
+SQLite store keeps the counter in the shared file, so this also holds across workers.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import sqlite3
+import threading
+import time
+
+
+class TTLStore:
+    """
+    Base class for stores. Subclasses implement get_many, set_many, invalidate, generation and clear.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evictions = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Return the values of keys; missing and expired keys are left out.
+        """
+        return {}
+
+    def set_many(self, items: Dict[str, Any], generation: Optional[int] = None):
+        pass
+
+    def invalidate(self, keys: Iterable[str]):
+        pass
+
+    def generation(self) -> int:
+        return 0
+
+    def clear(self):
+        pass
+
+
+class MemoryStore(TTLStore):
+    def __init__(self, ttl: float, max_entries: int):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        values = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                stored_at, value = entry
+                if now - stored_at > self.ttl:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                values[key] = value
+        return values
+
+    def set_many(self, items: Dict[str, Any], generation: Optional[int] = None):
+        now = time.monotonic()
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            for key, value in items.items():
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[str]):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def generation(self) -> int:
+        return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class SQLiteStore(TTLStore):
+    """
+    Store kept in a table of its own SQLite file, so it survives restarts and is shared between workers.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, table: str, ttl: float, max_entries: int):
+        super().__init__(ttl, max_entries)
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_last_access ON {table} (last_access)")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_generation (id INTEGER PRIMARY KEY CHECK (id = 0), generation INTEGER NOT NULL)")
+        self._conn.execute(f"INSERT OR IGNORE INTO {table}_generation (id, generation) VALUES (0, 0)")
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so no other worker can invalidate between
+        # reading the generation and writing
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _read_generation(self) -> int:
+        (generation,) = self._conn.execute(f"SELECT generation FROM {self.table}_generation").fetchone()
+        return generation
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ", ".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders}) AND created_at >= ?", (*keys, now - self.ttl)
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key IN ({', '.join('?' * len(rows))})", (now, *(key for key, _ in rows))
+                )
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_many(self, items: Dict[str, Any], generation: Optional[int] = None):
+        if not items:
+            return
+        now = time.time()
+        with self._transaction():
+            if generation is not None and generation != self._read_generation():
+                return
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(value, default=_json_default), now, now) for key, value in items.items()]
+            )
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl,))
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                self.evictions += count - self.max_entries
+
+    def invalidate(self, keys: Iterable[str]):
+        keys = list(keys)
+        with self._transaction():
+            self._conn.execute(f"UPDATE {self.table}_generation SET generation = generation + 1")
+            if keys:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key IN ({', '.join('?' * len(keys))})", keys)
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._read_generation()
+
+    def clear(self):
+        with self._transaction():
+            self._conn.execute(f"UPDATE {self.table}_generation SET generation = generation + 1")
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+
+def create_store(backend: str, path: str, table: str, ttl: float, max_entries: int) -> TTLStore:
+    """
+    Create the store for backend "memory", "sqlite" or "off".
+    """
+    if backend == "sqlite":
+        return SQLiteStore(path, table, ttl, max_entries)
+    if backend == "memory":
+        return MemoryStore(ttl, max_entries)
+    # "off": every lookup is a miss
+    return TTLStore(ttl, max_entries)
@@ -0,0 +1,108 @@
+"""
+Bounded pool of asyncio workers for background jobs.
+"""
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    Runs jobs on a fixed number of workers fed by a bounded queue.
+
+    Jobs are identified by a key; submitting a key that is already queued or running is a no-op,
+    and pending(key) lets callers wait for it. Failed jobs are retried with exponential backoff.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, retries: int, retry_delay: float):
+        self.name = name
+        self.workers = workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = []
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, key: Hashable, func: Callable[..., Awaitable], *args) -> bool:
+        """
+        Queue func(*args). Safe to call from the event loop and from threadpool route handlers.
+        Returns False if the pool is not running.
+        """
+        if self._loop is None:
+            return False
+        self._loop.call_soon_threadsafe(self._enqueue, key, func, args)
+        return True
+
+    def pending(self, key: Hashable) -> Optional[asyncio.Future]:
+        """
+        Return a future resolving when the job for key finishes, or None if there is none.
+        """
+        return self._pending.get(key)
+
+    def _enqueue(self, key: Hashable, func: Callable[..., Awaitable], args: tuple):
+        if key in self._pending:
+            return
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((key, func, args, future))
+        except asyncio.QueueFull:
+            logger.warning(f"{self.name}: queue full, dropping job {key}")
+            return
+        self._pending[key] = future
+
+    async def _worker(self):
+        while True:
+            key, func, args, future = await self._queue.get()
+            try:
+                await self._run(key, func, args, future)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # One broken job must not take the worker down with it
+                logger.exception(f"{self.name}: job {key} crashed")
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self._pending.pop(key, None)
+                self._queue.task_done()
+
+    async def _run(self, key: Hashable, func: Callable[..., Awaitable], args: tuple, future: asyncio.Future):
+        for attempt in range(self.retries + 1):
+            try:
+                result = await func(*args)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning(f"{self.name}: job {key} failed after {attempt + 1} attempts: {e}")
+                    # Waiters fall back to doing the work themselves
+                    if not future.done():
+                        future.set_result(None)
+                    return
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            else:
+                # A waiter that went away may have cancelled the shared future
+                if not future.done():
+                    future.set_result(result)
+                return
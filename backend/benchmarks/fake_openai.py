@@ -0,0 +1,142 @@
+"""
+Deterministic local stand-in for the OpenAI endpoints the backend uses.
+
+FakeOpenAITransport is an httpx transport, so the real AsyncOpenAI client (request building,
+response parsing, streaming, error types) is exercised without network access:
+- POST /v1/chat/completions, plain, streamed (SSE) and with tools
+- POST /v1/audio/transcriptions (response_format=text)
+- POST /v1/audio/speech
+
+Latency and error injection are configurable and seeded, so two runs see the same sequence.
+"""
+from typing import Dict
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+import httpx
+
+REPLIES = [
+    'Thanks. What outcome do you expect from the meeting? <agenda>\n"Status update", "Blockers"\n</agenda>',
+    'Got it. Who needs to be involved for the blockers? <agenda>\n"Status update", "Blockers", "Owners for blockers"\n</agenda>',
+    'Understood. Is there a deadline we should mention?',
+    'Great. Here is the final agenda. <agenda>\n"Status update", "Blockers", "Owners for blockers", "Deadlines"\n</agenda> #EOC# Goodbye!'
+]
+TRANSCRIPT = "I would like to talk about the release blockers and who owns them."
+# Not a valid MP3, but the backend only stores and forwards the bytes
+SPEECH_BYTES = b"ID3" + bytes(range(256)) * 16
+
+
+class FakeOpenAITransport(httpx.AsyncBaseTransport):
+    """
+    :param latency: mean seconds before a response (streams: before the first chunk)
+    :param jitter: latency varies uniformly by +/- jitter * latency
+    :param token_latency: seconds between streamed chunks
+    :param error_rate: fraction of requests answered with a 429 or 500
+    :param seed: seed for jitter and error injection
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.25, token_latency: float = 0.005,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+        self.errors = 0
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency * (1 + self._random.uniform(-self.jitter, self.jitter)))
+
+    def _error(self, request: httpx.Request):
+        self.errors += 1
+        if self._random.random() < 0.5:
+            status, kind = 429, "rate_limit_exceeded"
+            headers = {"retry-after-ms": "10"}
+        else:
+            status, kind = 500, "server_error"
+            headers = {}
+        return httpx.Response(status, headers=headers, json={"error": {"message": "injected error", "type": kind, "code": kind}}, request=request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        endpoint = path.rsplit("/v1", 1)[-1]
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        inject_error = self._random.random() < self.error_rate
+        await asyncio.sleep(self._delay())
+        if inject_error:
+            return self._error(request)
+
+        if endpoint == "/chat/completions":
+            return self._chat(request, json.loads(request.content or b"{}"))
+        if endpoint == "/audio/transcriptions":
+            return httpx.Response(200, text=TRANSCRIPT, headers={"content-type": "text/plain"}, request=request)
+        if endpoint == "/audio/speech":
+            return httpx.Response(200, content=SPEECH_BYTES, headers={"content-type": "audio/mpeg"}, request=request)
+        return httpx.Response(404, json={"error": {"message": f"unknown endpoint {path}", "type": "invalid_request_error"}}, request=request)
+
+    def _reply(self, body: dict) -> str:
+        # The same conversation state always gets the same reply
+        messages = body.get("messages", [])
+        if messages and "running summary" in str(messages[0].get("content", "")):
+            return "The user wants to discuss release blockers and their owners."
+        turn = sum(1 for message in messages if message.get("role") == "user")
+        digest = hashlib.sha256(json.dumps(messages[:1], sort_keys=True).encode()).digest()
+        return REPLIES[(turn + digest[0]) % len(REPLIES)]
+
+    def _usage(self, body: dict, text: str) -> dict:
+        prompt_tokens = sum(len(str(message.get("content") or "")) for message in body.get("messages", [])) // 4 + 1
+        completion_tokens = len(text) // 4 + 1
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    def _chat(self, request: httpx.Request, body: dict) -> httpx.Response:
+        text = self._reply(body)
+        model = body.get("model", "gpt-4o")
+        created = int(time.time())
+
+        if body.get("stream"):
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, stream=_SSEStream(text, model, created, self.token_latency), request=request
+            )
+
+        message = {"role": "assistant", "content": text}
+        if body.get("tools") and body.get("tool_choice") != "none":
+            message["tool_calls"] = [{
+                "id": "call_agenda",
+                "type": "function",
+                "function": {"name": "update_agenda", "arguments": json.dumps({"items": ["Status update", "Blockers"]})}
+            }]
+            message["content"] = text.split("<agenda>")[0].strip()
+        return httpx.Response(200, json={
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": self._usage(body, text)
+        }, request=request)
+
+
+class _SSEStream(httpx.AsyncByteStream):
+    def __init__(self, text: str, model: str, created: int, token_latency: float):
+        self.text = text
+        self.model = model
+        self.created = created
+        self.token_latency = token_latency
+
+    async def __aiter__(self):
+        for i in range(0, len(self.text), 4):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": self.created,
+                "model": self.model,
+                "choices": [{"index": 0, "delta": {"content": self.text[i:i + 4]}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+        yield b"data: [DONE]\n\n"
@@ -0,0 +1,254 @@
+"""
+Benchmark the backend in-process against the local OpenAI stand-in (benchmarks/fake_openai.py).
+
+    cd backend
+    python -m benchmarks.run --users 50 --turns 4 --latency 0.3 --error-rate 0.02
+    python -m benchmarks.run --check "chat.p95_ms<=1500" --check "dashboard.queries_per_request<=2"
+
+Scenarios run in order on a fresh SQLite database:
+- create_meetings: POST /meetings/
+- open_conversations: users join meetings and open their conversations at the same time
+- chat: every user sends --turns messages, users in parallel
+- chat_stream: one streamed message per user
+- audio: one raw audio upload per user
+- dashboard: meeting list and profile per user, --dashboard-loads times
+
+For each scenario the report shows throughput, p50/p95/p99 latency and SQL statements per
+request (including background work such as conversation pre-warming started by the scenario).
+--check fails the run (exit code 1) when a scenario metric exceeds its budget.
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .fake_openai import FakeOpenAITransport, SPEECH_BYTES
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Scenario:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.queries = 0
+        self.started = 0.0
+        self.finished = 0.0
+
+    def report(self) -> Dict[str, float]:
+        requests = len(self.latencies)
+        duration = max(self.finished - self.started, 1e-9)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "duration_s": round(duration, 3),
+            "throughput_rps": round(requests / duration, 1),
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 1),
+            "max_ms": round(max(self.latencies, default=0) * 1000, 1),
+            "queries_per_request": round(self.queries / requests, 2) if requests else 0.0
+        }
+
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, concurrency: int, db_queries):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.db_queries = db_queries
+        self.results: List[Scenario] = []
+        self.current: Scenario = None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except Exception:
+                self.current.errors += 1
+                self.current.latencies.append(time.perf_counter() - started)
+                return None
+            self.current.latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                self.current.errors += 1
+            return response
+
+    async def run(self, name: str, coroutine_factory):
+        self.current = Scenario(name)
+        queries_before = self.db_queries.value()
+        self.current.started = time.perf_counter()
+        result = await coroutine_factory()
+        self.current.finished = time.perf_counter()
+        self.current.queries = self.db_queries.value() - queries_before
+        self.results.append(self.current)
+        return result
+
+
+async def run_scenarios(bench: Bench, args) -> None:
+    async def create_meetings():
+        responses = await asyncio.gather(*[
+            bench.request("POST", "/meetings/", json={
+                "title": f"Meeting {i}",
+                "description": "Weekly sync on the release",
+                "date": "2025-01-01T10:00:00",
+                "meeting_type": "sync"
+            }) for i in range(args.meetings)
+        ])
+        return [response.json()["id"] for response in responses if response is not None and response.status_code == 200]
+
+    meeting_ids = await bench.run("create_meetings", create_meetings)
+    if not meeting_ids:
+        raise RuntimeError("No meetings could be created")
+
+    users = []
+    for i in range(args.users):
+        response = await bench.client.post("/users/", json={"username": f"user{i}"})
+        users.append((response.json()["id"], meeting_ids[i % len(meeting_ids)]))
+
+    async def open_conversations():
+        async def open_one(user_id, meeting_id):
+            await bench.request("POST", f"/meetings/{meeting_id}/add_user", params={"user_id": user_id})
+            await bench.request("GET", f"/meetings/{meeting_id}/{user_id}/conversation")
+        await asyncio.gather(*[open_one(user_id, meeting_id) for user_id, meeting_id in users])
+
+    async def chat():
+        async def chat_one(user_id, meeting_id):
+            for turn in range(args.turns):
+                await bench.request(
+                    "POST", f"/meetings/{meeting_id}/{user_id}/conversation/messages",
+                    params={"message": f"Turn {turn}: I want to discuss the release blockers."}
+                )
+        await asyncio.gather(*[chat_one(user_id, meeting_id) for user_id, meeting_id in users])
+
+    async def chat_stream():
+        async def stream_one(user_id, meeting_id):
+            response = await bench.request(
+                "POST", f"/meetings/{meeting_id}/{user_id}/conversation/message/stream",
+                params={"message": "Please add the deadlines as well."}
+            )
+            if response is not None and response.status_code == 200 and '"type": "done"' not in response.text:
+                bench.current.errors += 1
+        await asyncio.gather(*[stream_one(user_id, meeting_id) for user_id, meeting_id in users])
+
+    async def audio():
+        await asyncio.gather(*[
+            bench.request(
+                "POST", f"/meetings/{meeting_id}/{user_id}/conversation/message_audio_raw",
+                params={"filename": "message.mp3"}, content=SPEECH_BYTES, headers={"content-type": "audio/mpeg"}
+            ) for user_id, meeting_id in users
+        ])
+
+    async def dashboard():
+        async def load_one(user_id):
+            for _ in range(args.dashboard_loads):
+                await asyncio.gather(
+                    bench.request("GET", f"/meetings/by_user/{user_id}"),
+                    bench.request("GET", f"/users/{user_id}")
+                )
+        await asyncio.gather(*[load_one(user_id) for user_id, _ in users])
+
+    await bench.run("open_conversations", open_conversations)
+    await bench.run("chat", chat)
+    await bench.run("chat_stream", chat_stream)
+    await bench.run("audio", audio)
+    await bench.run("dashboard", dashboard)
+
+
+def parse_check(spec: str):
+    match = re.fullmatch(r"\s*(\w+)\.(\w+)\s*<=\s*([\d.]+)\s*", spec)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid check {spec!r}, expected scenario.metric<=value")
+    return match.group(1), match.group(2), float(match.group(3))
+
+
+def print_report(reports: Dict[str, Dict[str, float]], fake: FakeOpenAITransport):
+    columns = ["requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "queries_per_request"]
+    headers = ["scenario", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "max ms", "queries/req"]
+    rows = [[name] + [str(report[column]) for column in columns] for name, report in reports.items()]
+    widths = [max(len(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    for row in [headers] + rows:
+        print("  ".join(value.ljust(width) if i == 0 else value.rjust(width) for i, (value, width) in enumerate(zip(row, widths))))
+    print(f"\nOpenAI stand-in: {fake.calls} calls, {fake.errors} injected errors")
+
+
+async def main(args) -> int:
+    # Configure the app before it is imported: fresh database and caches, fast retries
+    workdir = tempfile.mkdtemp(prefix="benchmark-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/benchmark.db"
+    os.environ["TTS_CACHE_DIR"] = os.path.join(workdir, "tts-cache")
+    os.environ["RESPONSE_CACHE"] = "memory"
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("OPENAI_RETRY_BASE_DELAY", "0.05")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from openai import AsyncOpenAI
+    from app import ai_manager
+    from app.main import app
+    from app.util.metrics import db_queries
+
+    fake = FakeOpenAITransport(
+        latency=args.latency, jitter=args.jitter, token_latency=args.token_latency, error_rate=args.error_rate, seed=args.seed
+    )
+    ai_manager.async_client = AsyncOpenAI(
+        api_key="benchmark", base_url="http://openai.local/v1", max_retries=0,
+        http_client=httpx.AsyncClient(transport=fake)
+    )
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://backend.local", timeout=300) as client:
+            bench = Bench(client, args.concurrency, db_queries)
+            await run_scenarios(bench, args)
+
+    reports = {scenario.name: scenario.report() for scenario in bench.results}
+    print_report(reports, fake)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"arguments": vars(args), "scenarios": reports, "openai_calls": fake.calls}, f, indent=2)
+
+    failed = False
+    for scenario, metric, limit in args.check:
+        value = reports.get(scenario, {}).get(metric)
+        if value is None:
+            print(f"CHECK {scenario}.{metric}: unknown scenario or metric")
+            failed = True
+        elif value > limit:
+            print(f"CHECK {scenario}.{metric} = {value} exceeds {limit}")
+            failed = True
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the backend against a local OpenAI stand-in.")
+    parser.add_argument("--users", type=int, default=20, help="users opening a conversation")
+    parser.add_argument("--meetings", type=int, default=5, help="meetings the users are spread over")
+    parser.add_argument("--turns", type=int, default=3, help="chat messages per user")
+    parser.add_argument("--dashboard-loads", type=int, default=5, help="dashboard loads per user")
+    parser.add_argument("--concurrency", type=int, default=50, help="maximum requests in flight")
+    parser.add_argument("--latency", type=float, default=0.2, help="mean OpenAI latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.25, help="relative OpenAI latency jitter")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of OpenAI calls failing with 429/500")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="benchmark against this database instead of a fresh SQLite file")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--check", type=parse_check, action="append", default=[], metavar="SCENARIO.METRIC<=VALUE",
+                        help="fail if a metric exceeds the value, e.g. chat.p95_ms<=1500")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,7 @@
+import os
+
+# The OpenAI clients and caches are created at import time; tests never reach the API or
+# need the cache files
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("RESPONSE_CACHE", "memory")
+os.environ.setdefault("SPEECH_REQUESTS", "memory")
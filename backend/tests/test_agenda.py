@@ -0,0 +1,35 @@
+import pytest
+
+from app.agenda import extract_agenda, parse_agenda_items, render_message, strip_eoc
+
+
+@pytest.mark.parametrize("content, items", [
+    ('"Intro", "Budget", "Next steps"', ["Intro", "Budget", "Next steps"]),
+    ('["Intro", "Budget"]', ["Intro", "Budget"]),
+    ('"a" "b"', ["a", "b"]),
+    ('"a" "b", "c"', ["a", "b", "c"]),
+    ('“a” “b”', ["a", "b"]),
+    ('"Budget, Q3", "Hiring"', ["Budget, Q3", "Hiring"]),
+    ("Intro, Budget", ["Intro", "Budget"]),
+    ("- Intro\n- Budget, Q3", ["Intro", "Budget, Q3"]),
+    ("1. Intro\n2) Budget", ["Intro", "Budget"]),
+    ("", []),
+])
+def test_parse_agenda_items(content, items):
+    assert parse_agenda_items(content) == items
+
+
+def test_extract_agenda_uses_the_first_block():
+    text = 'Here: <agenda>"a"</agenda> and again <agenda>"b"</agenda>'
+    assert extract_agenda(text) == ["a"]
+    assert extract_agenda("no agenda") is None
+
+
+def test_strip_eoc_removes_every_marker():
+    assert strip_eoc("x #EOC# y #EOC#") == "x  y "
+    assert strip_eoc("x #EOC#EOC# y") == "x  y"
+    assert strip_eoc("x #EOC##EOC# y") == "x  y"
+
+
+def test_render_message():
+    assert render_message('Agenda:\n<agenda>"a", "b"</agenda>') == "Agenda:\n1. a\n2. b"
@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+import pytest
+
+from app.util.audio import AudioTooLarge, InvalidUpload, spool_multipart_file
+
+AUDIO_TYPES = {"audio/mpeg"}
+CONTENT_TYPE = "multipart/form-data; boundary=xyz"
+
+
+def multipart(*parts):
+    body = b""
+    for name, filename, content_type, data in parts:
+        body += f'--xyz\r\nContent-Disposition: form-data; name="{name}"'.encode()
+        if filename:
+            body += f'; filename="{filename}"\r\nContent-Type: {content_type}'.encode()
+        body += b"\r\n\r\n" + data + b"\r\n"
+    return body + b"--xyz--\r\n"
+
+
+def spool(body: bytes, size: int, content_type: str = CONTENT_TYPE):
+    async def chunks():
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+
+    return asyncio.run(spool_multipart_file(chunks(), content_type, "audio_file", 1000, AUDIO_TYPES))
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 10_000])
+def test_spools_the_field_in_any_chunking(size):
+    body = multipart(("voice", None, None, b"alloy"), ("audio_file", "note.mp3", "audio/mpeg", b"\r\n--xy" + b"a" * 500))
+    upload = spool(body, size)
+    try:
+        assert upload.filename == "note.mp3"
+        assert upload.content_type == "audio/mpeg"
+        assert upload.path.endswith(".mp3")
+        with open(upload.path, "rb") as f:
+            assert f.read() == b"\r\n--xy" + b"a" * 500
+    finally:
+        os.unlink(upload.path)
+
+
+def test_rejects_oversized_upload_while_it_arrives():
+    body = multipart(("audio_file", "note.mp3", "audio/mpeg", b"a" * 10_000))
+    # Rejected after about max_size bytes, not at the end of the body
+    with pytest.raises(AudioTooLarge):
+        asyncio.run(spool_multipart_file(stop_after(body, 100, limit=20), CONTENT_TYPE, "audio_file", 1000, AUDIO_TYPES))
+
+
+async def stop_after(body: bytes, size: int, limit: int):
+    for count, start in enumerate(range(0, len(body), size)):
+        assert count < limit, "read past the size limit"
+        yield body[start:start + size]
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (multipart(("audio_file", "note.txt", "text/plain", b"hello")), CONTENT_TYPE),
+    (multipart(("other", "note.mp3", "audio/mpeg", b"a")), CONTENT_TYPE),
+    (b"garbage", CONTENT_TYPE),
+    (b"a", "audio/mpeg"),
+])
+def test_rejects_invalid_uploads(body, content_type):
+    with pytest.raises(InvalidUpload):
+        spool(body, 64, content_type=content_type)
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from app.ai_manager import StreamingResponseParser, parse_assistant_response
+
+AGENDA_BLOCK = re.compile(r"<agenda>.*?</agenda>", re.DOTALL)
+
+RESPONSES = [
+    "Hello! What would you like to discuss?",
+    'Sounds good.\n<agenda>\n"Intro", "Budget", "Next steps"\n</agenda>\nAnything else?',
+    'Great, we are done.\n<agenda>"Intro", "Budget"</agenda>\n#EOC# Goodbye!',
+    "x #EOC#EOC# y",
+    "x #EOC##EOC# y #EOC#",
+    '<agenda>"a" "b"</agenda>',
+    'First <agenda>"a"</agenda> then <agenda>"b"</agenda> #EOC#',
+    "C# and #E and < are not markers #",
+    "Unterminated <agenda>\"a\"",
+]
+CHUNK_SIZES = [1, 2, 3, 5, 7, 100]
+
+
+def stream(response: str, size: int):
+    parser = StreamingResponseParser()
+    events = []
+    for start in range(0, len(response), size):
+        events.extend(parser.feed(response[start:start + size]))
+    events.extend(parser.close())
+    return parser, events
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_streaming_matches_non_streaming(response, size):
+    expected = parse_assistant_response(response)
+    parser, events = stream(response, size)
+
+    assert parser.result() == expected
+    agenda_events = [event["agenda"] for event in events if event["type"] == "agenda"]
+    assert agenda_events == ([] if expected["agenda"] is None else [expected["agenda"]])
+    text = "".join(event["content"] for event in events if event["type"] == "token")
+    assert "#EOC" not in text
+    if "</agenda>" in response or "<agenda>" not in response:
+        assert text.strip() == AGENDA_BLOCK.sub("", expected["response"]).strip()
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+def test_chunk_sizes_agree(response):
+    outputs = {size: stream(response, size)[1] for size in CHUNK_SIZES}
+    texts = {size: "".join(event.get("content", "") for event in events) for size, events in outputs.items()}
+    assert len(set(texts.values())) == 1
+
+
+def test_markers_are_stripped():
+    assert parse_assistant_response("x #EOC#EOC# y") == {"response": "x  y", "agenda": None, "conversation_ended": True}
+    assert parse_assistant_response('<agenda>"a" "b"</agenda>')["agenda"] == ["a", "b"]
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.util.worker_pool import WorkerPool
+
+
+async def wait_for_job(future):
+    return await future
+
+
+def test_cancelled_waiter_does_not_kill_the_worker():
+    async def scenario():
+        pool = WorkerPool("test", workers=1, queue_size=10, retries=1, retry_delay=0)
+        pool.start()
+        release = asyncio.Event()
+
+        async def slow_job():
+            await release.wait()
+            return "first"
+
+        async def fast_job():
+            return "second"
+
+        try:
+            pool.submit("a", slow_job)
+            await asyncio.sleep(0)
+            # A request waiting on the job goes away mid-job and cancels the shared future
+            waiter = asyncio.create_task(wait_for_job(pool.pending("a")))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            release.set()
+
+            pool.submit("b", fast_job)
+            await asyncio.sleep(0)
+            assert await asyncio.wait_for(pool.pending("b"), timeout=1) == "second"
+            assert pool.pending("a") is None
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_resolves_to_none():
+    async def scenario():
+        pool = WorkerPool("test", workers=1, queue_size=10, retries=1, retry_delay=0)
+        pool.start()
+        calls = []
+
+        async def failing_job():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        try:
+            pool.submit("a", failing_job)
+            await asyncio.sleep(0)
+            assert await asyncio.wait_for(pool.pending("a"), timeout=1) is None
+            assert len(calls) == 2
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())